@@ -0,0 +1,182 @@
+from functools import lru_cache
+from operator import itemgetter
+import numpy as np
+from data import move_layers
+from facelets import move_perms
+from move_tables import position_maps, orientation_perms, layer_positions, move_names
+
+
+class CompiledAlgorithm:
+    """This is a class that represents a move sequence composed into a single permutation"""
+
+    def __init__(self, moves: tuple[str]):
+        """Constructor for CompiledAlgorithm, composes the moves into one facelet permutation and one piece map
+
+        Args:
+            moves (tuple[str]): The moves of the algorithm, already validated and in table form
+        """
+        self.moves = moves
+
+        # facelets[facelet_perm] is the state after the whole algorithm
+        self.facelet_perm = np.arange(54)
+        for move_type in moves:
+            self.facelet_perm = self.facelet_perm[move_perms[move_type]]
+
+        # follow a piece from every position through the algorithm, keeping the ones that end up moved
+        self.piece_moves = {}
+        for start_pos in position_maps["R"]:
+            pos = start_pos
+            perm = tuple(range(6))
+            for move_type in moves:
+                if pos in layer_positions[move_type[0]]:
+                    pos = position_maps[move_type][pos]
+                    perm = tuple(perm[i] for i in orientation_perms[move_type])
+            if pos != start_pos or perm != tuple(range(6)):
+                self.piece_moves[start_pos] = (pos, itemgetter(*perm))
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def __repr__(self):
+        return f"CompiledAlgorithm({' '.join(self.moves)!r})"
+
+
+def parse_algorithm(algorithm: str | list[str]) -> tuple[str]:
+    """Parses an algorithm into a tuple of moves that can be looked up in the move tables
+
+    Args:
+        algorithm (str | list[str]): The algorithm as a list of moves or a space separated string
+
+    Raises:
+        ValueError: If any move type is invalid
+
+    Returns:
+        tuple[str]: The moves of the algorithm (X'2 is written as X2)
+    """
+    if isinstance(algorithm, str):
+        algorithm = algorithm.split()
+    try:
+        return tuple(move_names[move_type] for move_type in algorithm)
+    except KeyError:
+        raise ValueError("Invalid move type")
+
+
+# the quarter turns a move is worth, counted clockwise
+move_amounts = {"": 1, "2": 2, "'": 3}
+# opposite faces commute, runs of moves on one axis are written in this face order
+face_order = "RLUDFB"
+
+
+def simplify_algorithm(algorithm: str | list[str], half_turns: bool = False) -> list[str]:
+    """Reduces an algorithm to an equivalent one with no redundant moves
+
+    Moves are pushed onto a stack whose top run of moves on the same axis is kept merged: a move is combined with a
+    move of the same face anywhere in that run (moves on one axis commute), and dropped when they cancel out. Because
+    the stack is always fully reduced, cascades like R U U' R' collapse in a single pass.
+
+    Args:
+        algorithm (str | list[str]): The algorithm as a list of moves or a space separated string
+        half_turns (bool, optional): If True, two quarter turns are written as a half turn (X2), otherwise as X X. Defaults to False.
+
+    Raises:
+        ValueError: If any move type is invalid
+
+    Returns:
+        list[str]: The simplified algorithm, with each run of moves on one axis in a fixed face order
+    """
+    # each entry is the axis and a dict of face -> quarter turns for a run of moves on that axis
+    stack = []
+    for move_type in parse_algorithm(algorithm):
+        face, amount = move_type[0], move_amounts[move_type[1:]]
+        axis = move_layers[face][0]
+        if not stack or stack[-1][0] != axis:
+            stack.append((axis, {}))
+        run = stack[-1][1]
+        run[face] = (run.get(face, 0) + amount) % 4
+        if run[face] == 0:
+            del run[face]
+            if not run:
+                stack.pop()
+
+    simplified = []
+    for _, run in stack:
+        for face in sorted(run, key=face_order.index):
+            if run[face] == 2 and not half_turns:
+                simplified += [face, face]
+            else:
+                simplified.append(face + {1: "", 2: "2", 3: "'"}[run[face]])
+    return simplified
+
+
+def expand_half_turns(moves: list[str]) -> list[str]:
+    """Writes every half turn as two quarter turns
+
+    Args:
+        moves (list[str]): The moves to expand
+
+    Returns:
+        list[str]: The same moves using only quarter turns
+    """
+    expanded = []
+    for move_type in moves:
+        if move_type[-1] == "2":
+            expanded += [move_type[:-1], move_type[:-1]]
+        else:
+            expanded.append(move_type)
+    return expanded
+
+
+def inverse_move(move_type: str) -> str:
+    """Returns the inverse of the given move
+
+    Args:
+        move_type (str): The move to invert, a quarter or half turn
+
+    Returns:
+        str: The inverse of the given move
+    """
+    if move_type[-1] == "2":
+        return move_type
+    return move_type[:-1] if move_type[-1] == "'" else move_type + "'"
+
+
+def inverse_moves(moves: list[str]) -> list[str]:
+    """Returns the algorithm that undoes the given moves
+
+    Args:
+        moves (list[str]): The moves to invert
+
+    Returns:
+        list[str]: The inverse of each move, in reverse order
+    """
+    return [inverse_move(move_type) for move_type in reversed(moves)]
+
+
+@lru_cache(maxsize=4096)
+def compile_moves(moves: tuple[str]) -> CompiledAlgorithm:
+    """Compiles a parsed move sequence, caching the result
+
+    Args:
+        moves (tuple[str]): The moves as returned by parse_algorithm
+
+    Returns:
+        CompiledAlgorithm: The compiled algorithm
+    """
+    return CompiledAlgorithm(moves)
+
+
+def compile_algorithm(algorithm: str | list[str] | CompiledAlgorithm) -> CompiledAlgorithm:
+    """Compiles an algorithm into a single permutation that can be applied to a cube or a batch in one step
+
+    Args:
+        algorithm (str | list[str] | CompiledAlgorithm): The algorithm as a list of moves or a space separated string
+
+    Raises:
+        ValueError: If any move type is invalid
+
+    Returns:
+        CompiledAlgorithm: The compiled algorithm, shared with every other caller that compiled the same moves
+    """
+    if isinstance(algorithm, CompiledAlgorithm):
+        return algorithm
+    return compile_moves(parse_algorithm(algorithm))
@@ -0,0 +1,143 @@
+"""Runs solvers in a worker process, so the simulation keeps rendering while a solve is running.
+
+The worker is a separate process rather than a thread: solve_cube is pure Python and holds the GIL for most
+of its run, and the first kociemba call spends seconds building its tables, so a thread would still stall
+the render loop. The worker is kept between solves, so the solvers' tables are only loaded once. Neither solver
+can be interrupted from inside, so cancelling a running solve terminates the worker and the next solve starts
+a new one.
+"""
+import multiprocessing
+from concurrent.futures import Future
+import kociemba
+from cube import RubiksCube
+from solution import SolveResult
+from solver import solve_cube
+
+methods = ["beginners", "kociemba"]
+
+
+def solve_notation(notation: str, method: str) -> SolveResult | list[str]:
+    """Solves a cube given in string notation (runs in the worker)
+
+    Args:
+        notation (str): The cube in string notation (UDFBLR notation)
+        method (str): The solving method (beginners or kociemba)
+
+    Raises:
+        ValueError: If the method is invalid or the cube is not solvable
+
+    Returns:
+        SolveResult | list[str]: The stages of the solution for the beginner's method, the moves for kociemba
+    """
+    if method == "kociemba":
+        return kociemba.solve(notation).split()
+    elif method == "beginners":
+        return solve_cube(RubiksCube.from_string_notation(notation), in_place=False)
+    else:
+        raise ValueError("Invalid method")
+
+
+def worker_loop(connection):
+    """Solves every cube sent over the connection and sends back the result (runs in the worker)
+
+    Args:
+        connection: The worker end of a pipe, which receives (notation, method) pairs and sends back
+            (result, exception) pairs
+    """
+    while True:
+        try:
+            notation, method = connection.recv()
+        except EOFError:
+            return
+        try:
+            connection.send((solve_notation(notation, method), None))
+        except Exception as e:
+            connection.send((None, e))
+
+
+class BackgroundSolver:
+    """This is a class that runs one solve at a time in a worker process and lets it be cancelled"""
+
+    def __init__(self):
+        """Constructor for BackgroundSolver"""
+
+        self.process = None
+        self.connection = None
+        self.future = None
+
+    @property
+    def busy(self) -> bool:
+        return self.future is not None
+
+    def start_worker(self):
+        self.connection, worker_connection = multiprocessing.Pipe()
+        # a daemon process is stopped when the program exits, so it never keeps the program running
+        self.process = multiprocessing.Process(target=worker_loop, args=(worker_connection,), daemon=True)
+        self.process.start()
+        worker_connection.close()
+
+    def stop_worker(self):
+        if self.process is None:
+            return
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+    def submit(self, cube: RubiksCube, method: str) -> Future:
+        """Starts solving a cube, cancelling any solve that is still running
+
+        Args:
+            cube (RubiksCube): The cube to solve, it is not changed
+            method (str): The solving method (beginners or kociemba)
+
+        Returns:
+            Future: The future of the solution (see solve_notation), completed by poll
+        """
+        self.cancel()
+        if self.process is None:
+            self.start_worker()
+        self.connection.send((cube.to_string_notation(), method))
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+        return self.future
+
+    def cancel(self):
+        """Stops the running solve, its result is never returned"""
+
+        if self.future is None:
+            return
+        if self.connection.poll():
+            # the solve already finished, so the worker can be kept
+            self.connection.recv()
+        else:
+            self.stop_worker()
+        self.future = None
+
+    def poll(self) -> Future | None:
+        """Checks whether the solve has finished, call it from the frame loop
+
+        Returns:
+            Future | None: The finished future (once), or None if nothing has finished
+        """
+        if self.future is None or not self.connection.poll():
+            return None
+        try:
+            result, exception = self.connection.recv()
+        except EOFError:
+            # the worker died, a new one is started by the next solve
+            result, exception = None, RuntimeError("The solver process exited")
+            self.stop_worker()
+        future, self.future = self.future, None
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+        return future
+
+    def shutdown(self):
+        """Stops any running solve and the worker process, call it before the program exits"""
+
+        self.future = None
+        self.stop_worker()
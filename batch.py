@@ -0,0 +1,112 @@
+import numpy as np
+from cube import RubiksCube
+from algorithms import CompiledAlgorithm, compile_algorithm
+from facelets import move_perms, notation_order, notation_table, solved_facelets
+from move_tables import move_names
+
+# lookup array version of notation_table, so a whole batch can be translated with one gather
+notation_lut = np.frombuffer(bytes(range(256)).translate(notation_table), dtype=np.uint8)
+
+
+class CubeBatch:
+    """This is a class that represents many cube states at once, stored as an N x 54 array of facelet colors"""
+
+    def __init__(self, facelets: np.ndarray):
+        """Constructor for CubeBatch
+
+        Args:
+            facelets (np.ndarray): An N x 54 array of facelet colors as ASCII codes (see facelets.py for the layout)
+
+        Raises:
+            ValueError: If the array does not have 54 facelets per cube
+        """
+        facelets = np.asarray(facelets, dtype=np.uint8)
+        if facelets.ndim != 2 or facelets.shape[1] != 54:
+            raise ValueError("Expected an N x 54 array of facelets")
+        self.facelets = facelets
+
+    @classmethod
+    def solved(cls, num_cubes: int) -> "CubeBatch":
+        """Creates a batch of solved cubes
+
+        Args:
+            num_cubes (int): The number of cubes in the batch
+
+        Returns:
+            CubeBatch: A batch of num_cubes solved cubes
+        """
+        return cls(np.tile(solved_facelets, (num_cubes, 1)))
+
+    @classmethod
+    def from_cubes(cls, cubes: list[RubiksCube]) -> "CubeBatch":
+        """Creates a batch from individual cubes
+
+        Args:
+            cubes (list[RubiksCube]): The cubes to copy the states of
+
+        Returns:
+            CubeBatch: A batch holding the state of each cube, in the same order
+        """
+        return cls(np.stack([cube.state.facelets for cube in cubes]) if cubes else np.empty((0, 54)))
+
+    def to_cubes(self) -> list[RubiksCube]:
+        """Converts the batch to individual cubes
+
+        Returns:
+            list[RubiksCube]: A cube for each state in the batch
+        """
+        return [RubiksCube.from_facelets(facelets) for facelets in self.facelets]
+
+    def __len__(self) -> int:
+        return len(self.facelets)
+
+    def move(self, move_type: str):
+        """Performs the specified move on every cube in the batch
+
+        Args:
+            move_type (str): The type of move to perform (using standard cube notation, X2 and X'2 are half turns)
+
+        Raises:
+            ValueError: If the move type is invalid
+        """
+        if move_type not in move_names:
+            raise ValueError("Invalid move type")
+        self.facelets = self.facelets[:, move_perms[move_names[move_type]]]
+
+    def apply_algorithm(self, algorithm: str | list[str] | CompiledAlgorithm):
+        """Performs a sequence of moves on every cube in the batch with a single gather
+
+        Args:
+            algorithm (str | list[str] | CompiledAlgorithm): The algorithm as a list of moves, a space separated string or already compiled
+
+        Raises:
+            ValueError: If any move type is invalid
+        """
+        self.facelets = self.facelets[:, compile_algorithm(algorithm).facelet_perm]
+
+    def state_keys(self) -> list[bytes]:
+        """Gets the state key of every cube in the batch, matching RubiksCube.state_key
+
+        Returns:
+            list[bytes]: The 54 facelet colors of each cube
+        """
+        data = self.facelets.tobytes()
+        return [data[i:i + 54] for i in range(0, len(data), 54)]
+
+    def check_solved(self) -> np.ndarray:
+        """Checks which cubes in the batch are solved
+
+        Returns:
+            np.ndarray: A boolean array that is True for every solved cube
+        """
+        by_face = self.facelets.reshape(-1, 6, 9)
+        return (by_face == by_face[:, :, 4:5]).all(axis=(1, 2))
+
+    def to_string_notation(self) -> list[str]:
+        """Converts every cube in the batch to string notation (UDFBLR notation)
+
+        Returns:
+            list[str]: The string notation of each cube
+        """
+        notation = notation_lut[self.facelets[:, notation_order]].tobytes().decode()
+        return [notation[i:i + 54] for i in range(0, len(notation), 54)]
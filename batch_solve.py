@@ -0,0 +1,154 @@
+"""Solves many cubes in parallel, reading one cube per line in string notation (UDFBLR notation)
+and writing one JSON object per line, in input order.
+
+Usage:
+    python batch_solve.py scrambles.txt --method kociemba --workers 8 > solutions.jsonl
+    python batch_solve.py < scrambles.txt
+    python batch_solve.py scrambles.txt --profile profile.json > solutions.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import kociemba
+import solver
+from cube import RubiksCube
+from instrumentation import Profiler
+
+methods = ["beginners", "kociemba"]
+
+
+def solve_line(line_number: int, notation: str, method: str) -> dict:
+    """Solves and verifies a single cube
+
+    Args:
+        line_number (int): The line of the input the cube was read from, copied to the result
+        notation (str): The cube in string notation
+        method (str): The solving method (beginners or kociemba)
+
+    Returns:
+        dict: The result, with the solution, its move count and the time taken (and the moves and time of each
+            stage for the beginner's method), or an error message
+    """
+    result = {"line": line_number, "cube": notation, "method": method}
+    try:
+        cube = RubiksCube.from_string_notation(notation)
+        start = time.perf_counter()
+        if method == "kociemba":
+            moves = kociemba.solve(notation).split()
+        else:
+            # through the module, so a Profiler can wrap it
+            solution = solver.solve_cube(cube, in_place=False)
+            moves = solution.moves
+            result["stages"] = solution.to_dict()["stages"]
+        result["time"] = time.perf_counter() - start
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+
+    cube.apply_algorithm(moves)
+    result["moves"] = " ".join(moves)
+    result["move_count"] = len(moves)
+    result["verified"] = cube.check_solved()
+    return result
+
+
+def solve_chunk(chunk: list[tuple[int, str]], method: str, profile: bool = False) -> tuple[list[dict], list[dict]]:
+    """Solves a chunk of cubes in one worker call, so results cross the process boundary in bulk
+
+    Args:
+        chunk (list[tuple[int, str]]): The line number and string notation of each cube
+        method (str): The solving method (beginners or kociemba)
+        profile (bool, optional): Whether to record the stages of the beginner's method with a Profiler. Defaults to False.
+
+    Returns:
+        tuple[list[dict], list[dict]]: The result for each cube, in order, and the profiler records (empty if
+            not profiling)
+    """
+    if not profile:
+        return [solve_line(line_number, notation, method) for line_number, notation in chunk], []
+    with Profiler() as profiler:
+        results = [solve_line(line_number, notation, method) for line_number, notation in chunk]
+    return results, profiler.records
+
+
+def read_chunks(lines, chunk_size: int):
+    """Groups the non-empty input lines into chunks
+
+    Args:
+        lines: An iterable of input lines
+        chunk_size (int): The number of cubes per chunk
+
+    Yields:
+        list[tuple[int, str]]: The line number and stripped text of each cube in the chunk
+    """
+    chunk = []
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append((line_number, line))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def solve_stream(lines, method: str = "beginners", workers: int = None, chunk_size: int = 64,
+                 profiler: Profiler = None):
+    """Solves every cube in the input on a process pool, keeping only a few chunks in flight
+
+    Args:
+        lines: An iterable of input lines, one cube in string notation per line
+        method (str, optional): The solving method (beginners or kociemba). Defaults to "beginners".
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        chunk_size (int, optional): The number of cubes sent to a worker at once. Defaults to 64.
+        profiler (Profiler, optional): If given, the workers profile their solves and the records are added to it.
+            Defaults to None.
+
+    Yields:
+        dict: The result for each cube, in input order
+    """
+    workers = workers or os.cpu_count() or 1
+
+    def collect(future) -> list[dict]:
+        results, records = future.result()
+        if profiler is not None:
+            profiler.records.extend(records)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in read_chunks(lines, chunk_size):
+            pending.append(executor.submit(solve_chunk, chunk, method, profiler is not None))
+            # results are taken from the front, so output stays in order while the pool stays busy
+            if len(pending) >= workers * 2:
+                yield from collect(pending.popleft())
+        while pending:
+            yield from collect(pending.popleft())
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Solve cubes given in string notation (UDFBLR notation), one per line")
+    parser.add_argument("input", nargs="?", type=argparse.FileType("r"), default=sys.stdin,
+                        help="file with one cube per line (default: stdin)")
+    parser.add_argument("--method", choices=methods, default="beginners", help="solving method (default: beginners)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="cubes sent to a worker at once (default: 64)")
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help="write per-stage timings, counters and histograms as JSON (beginner's method only)")
+    args = parser.parse_args(argv)
+
+    profiler = Profiler() if args.profile else None
+    for result in solve_stream(args.input, args.method, args.workers, args.chunk_size, profiler):
+        print(json.dumps(result), flush=True)
+    if profiler is not None:
+        profiler.to_json(args.profile)
+
+
+if __name__ == "__main__":
+    main()
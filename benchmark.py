@@ -0,0 +1,396 @@
+import argparse
+import json
+import random
+import sys
+import time
+from timeit import timeit
+import numpy as np
+import kociemba
+import optimal
+import parallel_search
+import solver
+import twophase
+from algorithms import simplify_algorithm
+from cube import Piece, RubiksCube
+from data import move_maps, generate_rotation_matrix
+from peephole import peephole_optimize
+from solution import stage_names
+
+quarter_turns = list(move_maps)
+faces = ["top", "front", "right", "back", "left", "bottom"]
+# the percentile compare_to_baseline fails on, the tail of microsecond calls is mostly scheduler noise
+gated_keys = ["p50_us"]
+# the percentiles whose changes are reported without failing
+reported_keys = ["p95_us", "p99_us"]
+
+
+def legacy_piece_move(piece: Piece, move_type: str):
+    """The original Piece.move, which builds a rotation matrix for every call
+
+    Args:
+        piece (Piece): The piece to move
+        move_type (str): The type of move to perform (using standard cube notation)
+    """
+    rotation_matrix = generate_rotation_matrix(move_type)
+    vec = np.array(piece.pos)
+    piece.pos = tuple(np.dot(rotation_matrix, vec))
+    move_map = move_maps[move_type]
+
+    new_orientation = [*piece.orientation]
+    for i, x in enumerate(piece.orientation):
+        new_orientation[move_map[i]] = x
+    piece.orientation = "".join(new_orientation)
+
+
+def benchmark_piece_move(number: int = 20000) -> dict[str, float]:
+    """Times a single piece move using the rotation matrix path and the move table path
+
+    Args:
+        number (int, optional): The number of moves to time. Defaults to 20000.
+
+    Returns:
+        dict[str, float]: The time per move in microseconds for each path
+    """
+    piece = Piece("c", "wrb000", (1, -1, 1))
+    legacy = timeit(lambda: [legacy_piece_move(piece, move_type) for move_type in quarter_turns],
+                    number=number // len(quarter_turns))
+    piece = Piece("c", "wrb000", (1, -1, 1))
+    table = timeit(lambda: [piece.move(move_type) for move_type in quarter_turns],
+                   number=number // len(quarter_turns))
+    return {
+        "rotation matrix": legacy / number * 1e6,
+        "move table": table / number * 1e6
+    }
+
+
+def random_cubes(count: int, seed: int = 0, scramble_length: int = 30) -> list[RubiksCube]:
+    """Scrambles cubes with a fixed seed, so every run benchmarks the same positions
+
+    Args:
+        count (int): The number of cubes
+        seed (int, optional): The random seed. Defaults to 0.
+        scramble_length (int, optional): The number of random quarter turns per cube. Defaults to 30.
+
+    Returns:
+        list[RubiksCube]: The scrambled cubes
+    """
+    rng = random.Random(seed)
+    cubes = []
+    for _ in range(count):
+        cube = RubiksCube()
+        cube.apply_algorithm([rng.choice(quarter_turns) for _ in range(scramble_length)])
+        cubes.append(cube)
+    return cubes
+
+
+def benchmark_two_phase(count: int = 50, max_length: int = 22) -> dict[str, dict[str, float]]:
+    """Solves the same scrambles with the native two-phase solver and the kociemba package
+
+    The native solver's tables are loaded before timing starts.
+
+    Args:
+        count (int, optional): The number of scrambles. Defaults to 50.
+        max_length (int, optional): The move count the native solver stops at (kociemba also uses 22 by default). Defaults to 22.
+
+    Returns:
+        dict[str, dict[str, float]]: The mean and max solve time in milliseconds and the mean move count for each solver
+    """
+    twophase.get_tables()
+    cubes = random_cubes(count)
+    solvers = {
+        "twophase": lambda cube: twophase.solve(cube, max_length=max_length),
+        "kociemba": lambda cube: kociemba.solve(cube.to_string_notation()).split()
+    }
+
+    results = {}
+    for name, solve in solvers.items():
+        times, lengths = [], []
+        for cube in cubes:
+            start = time.perf_counter()
+            moves = solve(cube)
+            times.append(time.perf_counter() - start)
+            lengths.append(len(moves))
+        results[name] = {
+            "mean ms": float(np.mean(times)) * 1e3,
+            "max ms": float(np.max(times)) * 1e3,
+            "mean moves": float(np.mean(lengths))
+        }
+    return results
+
+
+def benchmark_parallel_search(worker_counts: tuple[int] = (1, 2, 4), count: int = 3,
+                              scramble_length: int = 14) -> dict[str, float]:
+    """Times the optimal search on the same scrambles serially and split across each number of workers
+
+    Args:
+        worker_counts (tuple[int], optional): The pool sizes to time. Defaults to (1, 2, 4).
+        count (int, optional): The number of scrambles. Defaults to 3.
+        scramble_length (int, optional): The number of random quarter turns per scramble (optimal solutions of 12-13 moves). Defaults to 14.
+
+    Returns:
+        dict[str, float]: The total time in seconds for the serial search and for each pool size
+    """
+    optimal.get_tables()
+    cubes = random_cubes(count, seed=1, scramble_length=scramble_length)
+    results = {"serial": timeit(lambda: [optimal.solve_optimal(cube) for cube in cubes], number=1)}
+    for workers in worker_counts:
+        results[f"{workers} workers"] = timeit(
+            lambda: [parallel_search.solve_optimal_parallel(cube, workers=workers) for cube in cubes], number=1)
+    return results
+
+
+def benchmark_peephole(count: int = 100) -> dict[str, float]:
+    """Compares the beginner's method move count with cancellation only and with the peephole optimizer
+
+    Args:
+        count (int, optional): The number of scrambles in the corpus. Defaults to 100.
+
+    Returns:
+        dict[str, float]: The average move count of each
+    """
+    stage_solvers = [solver.solve_white_cross, solver.solve_first_layer, solver.solve_second_layer,
+                     solver.solve_yellow_cross, solver.solve_yellow_edges, solver.solve_yellow_corner_position,
+                     solver.solve_yellow_corner_orientation]
+    simplified, optimized = [], []
+    for cube in random_cubes(count, seed=2):
+        stages = [stage_solver(cube) for stage_solver in stage_solvers]
+        simplified.append(sum(len(simplify_algorithm(stage)) for stage in stages))
+        optimized.append(sum(len(simplify_algorithm(peephole_optimize(simplify_algorithm(stage)))) for stage in stages))
+    return {
+        "simplify": float(np.mean(simplified)),
+        "simplify + peephole": float(np.mean(optimized))
+    }
+
+
+def latency_stats(samples: list[float]) -> dict[str, float]:
+    """Summarizes per-call times
+
+    Args:
+        samples (list[float]): The time of each call in seconds
+
+    Returns:
+        dict[str, float]: The mean, p50, p95 and p99 in microseconds, and the number of calls
+    """
+    samples = np.asarray(samples) * 1e6
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"calls": len(samples), "mean_us": float(samples.mean()),
+            "p50_us": float(p50), "p95_us": float(p95), "p99_us": float(p99)}
+
+
+def time_calls(function, arguments: list, repeat: int = 1) -> list[float]:
+    """Times each call of a function separately
+
+    Args:
+        function: The function to time
+        arguments (list): The argument of each call
+        repeat (int, optional): The number of times each call is repeated, for calls too fast to time one at a
+            time. Defaults to 1.
+
+    Returns:
+        list[float]: The time of each call in seconds (averaged over the repeats)
+    """
+    samples = []
+    for argument in arguments:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function(argument)
+        samples.append((time.perf_counter() - start) / repeat)
+    return samples
+
+
+def benchmark_suite(count: int = 200, seed: int = 0, moves_per_cube: int = 100) -> dict[str, dict[str, float]]:
+    """Times the hot paths of the cube and the solvers on a fixed-seed scramble corpus
+
+    Args:
+        count (int, optional): The number of scrambles in the corpus. Defaults to 200.
+        seed (int, optional): The random seed of the corpus. Defaults to 0.
+        moves_per_cube (int, optional): The number of moves timed on each cube. Defaults to 100.
+
+    Returns:
+        dict[str, dict[str, float]]: The latency statistics of each benchmark (see latency_stats), with the moves
+            per second for RubiksCube.move and the mean moves per solution for the solvers
+    """
+    cubes = random_cubes(count, seed)
+    rng = random.Random(seed)
+    results = {}
+
+    # RubiksCube.move, on a copy so the corpus stays the same for the other benchmarks
+    samples = []
+    for cube in cubes:
+        cube = cube.copy()
+        samples += time_calls(cube.move, [rng.choice(quarter_turns) for _ in range(moves_per_cube)])
+    results["move"] = latency_stats(samples)
+    results["move"]["moves_per_second"] = len(samples) / sum(samples)
+
+    results["get_face"] = latency_stats(time_calls(lambda pair: pair[0].get_face(pair[1]),
+                                                   [(cube, face) for cube in cubes for face in faces], repeat=100))
+    results["to_string_notation"] = latency_stats(time_calls(RubiksCube.to_string_notation, cubes, repeat=100))
+    results["check_solved"] = latency_stats(time_calls(RubiksCube.check_solved, cubes, repeat=100))
+
+    # the case tables and the peephole table are loaded before timing starts
+    solver.solve_cube(cubes[0], in_place=False)
+    solutions = []
+    samples = time_calls(lambda cube: solutions.append(solver.solve_cube(cube, in_place=False)), cubes)
+    results["solve_cube"] = latency_stats(samples)
+    results["solve_cube"]["moves_per_solution"] = float(np.mean([len(solution) for solution in solutions]))
+    for i, name in enumerate(stage_names):
+        stages = [solution.stages[i] for solution in solutions]
+        results[f"solve_cube: {name}"] = latency_stats([stage.seconds for stage in stages])
+        results[f"solve_cube: {name}"]["moves_per_solution"] = float(np.mean([len(stage) for stage in stages]))
+
+    notations = [cube.to_string_notation() for cube in cubes]
+    solutions = []
+    samples = time_calls(lambda notation: solutions.append(kociemba.solve(notation).split()), notations)
+    results["kociemba"] = latency_stats(samples)
+    results["kociemba"]["moves_per_solution"] = float(np.mean([len(solution) for solution in solutions]))
+    return results
+
+
+def best_of_runs(runs: list[dict[str, dict[str, float]]]) -> dict[str, dict[str, float]]:
+    """Combines repeated runs of benchmark_suite, keeping the best value of each metric
+
+    Noise only ever makes a run slower, so the fastest of several runs is the most repeatable figure.
+
+    Args:
+        runs (list[dict[str, dict[str, float]]]): The results of each run
+
+    Returns:
+        dict[str, dict[str, float]]: The lowest latencies and the highest moves per second of each benchmark
+    """
+    results = {}
+    for name, result in runs[0].items():
+        results[name] = dict(result)
+        for key in result:
+            if key.endswith("_us"):
+                results[name][key] = min(run[name][key] for run in runs)
+            elif key == "moves_per_second":
+                results[name][key] = max(run[name][key] for run in runs)
+    return results
+
+
+def latency_changes(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], keys: list[str],
+                    tolerance: float = 0.25, floor_us: float = 2.0) -> list[str]:
+    """Finds the latencies that grew by more than both the tolerance and the floor
+
+    Args:
+        results (dict[str, dict[str, float]]): The results of benchmark_suite
+        baseline (dict[str, dict[str, float]]): Earlier results of benchmark_suite, as saved by save_baseline
+        keys (list[str]): The latency keys to check
+        tolerance (float, optional): How much slower a latency may get before it counts, as a fraction. Defaults to 0.25.
+        floor_us (float, optional): How many microseconds slower a latency may get whatever the fraction. Defaults to 2.0.
+
+    Returns:
+        list[str]: A description of each change
+    """
+    changes = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in keys:
+            before, after = baseline[name][key], result[key]
+            if after > before * (1 + tolerance) and after - before > floor_us:
+                changes.append(f"{name} {key}: {before:.2f} -> {after:.2f}")
+    return changes
+
+
+def compare_to_baseline(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]],
+                        tolerance: float = 0.25, floor_us: float = 2.0) -> list[str]:
+    """Finds the benchmarks that got slower (or longer solutions) than a saved baseline
+
+    Only the median latency is checked, see reported_keys for the percentiles that are reported instead.
+
+    Args:
+        results (dict[str, dict[str, float]]): The results of benchmark_suite
+        baseline (dict[str, dict[str, float]]): Earlier results of benchmark_suite, as saved by save_baseline
+        tolerance (float, optional): How much slower the median may get before it counts, as a fraction. Defaults to 0.25.
+        floor_us (float, optional): How many microseconds slower the median may get whatever the fraction. Defaults to 2.0.
+
+    Returns:
+        list[str]: A description of each regression, empty if there are none
+    """
+    regressions = latency_changes(results, baseline, gated_keys, tolerance, floor_us)
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        # the solvers are deterministic, so any change in solution length is a real change
+        if "moves_per_solution" in result and result["moves_per_solution"] > baseline[name].get("moves_per_solution", np.inf):
+            regressions.append(f"{name} moves_per_solution: {baseline[name]['moves_per_solution']:.2f} -> "
+                               f"{result['moves_per_solution']:.2f}")
+    return regressions
+
+
+def save_baseline(results: dict[str, dict[str, float]], path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_baseline(path: str) -> dict[str, dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_suite(results: dict[str, dict[str, float]]):
+    for name, result in results.items():
+        line = f"{name}: p50 {result['p50_us']:.1f} us, p95 {result['p95_us']:.1f} us, p99 {result['p99_us']:.1f} us"
+        if "moves_per_second" in result:
+            line += f", {result['moves_per_second']:.0f} moves/s"
+        if "moves_per_solution" in result:
+            line += f", {result['moves_per_solution']:.1f} moves"
+        print(line)
+
+
+def print_comparisons():
+    results = benchmark_piece_move()
+    for name, usec in results.items():
+        print(f"Piece.move ({name}): {usec:.2f} us/move")
+    print(f"Speedup: {results['rotation matrix'] / results['move table']:.1f}x")
+
+    for name, result in benchmark_two_phase().items():
+        print(f"{name}: {result['mean ms']:.1f} ms mean, {result['max ms']:.1f} ms max, {result['mean moves']:.1f} moves")
+
+    results = benchmark_parallel_search()
+    for name, seconds in results.items():
+        print(f"Optimal search ({name}): {seconds:.2f} s, {results['serial'] / seconds:.2f}x")
+
+    for name, moves in benchmark_peephole().items():
+        print(f"Beginner's method ({name}): {moves:.1f} moves")
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the cube and the solvers on a fixed-seed scramble corpus")
+    parser.add_argument("--count", type=int, default=200, help="scrambles in the corpus (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus (default: 0)")
+    parser.add_argument("--baseline", metavar="PATH", default=None, help="compare against a saved baseline JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", default=None, help="save the results as a baseline JSON")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="times the suite is run, the best result of each benchmark is kept (default: 3)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="fraction the median may grow before it is a regression (default: 0.25)")
+    parser.add_argument("--floor", type=float, default=2.0,
+                        help="microseconds the median may grow before it is a regression (default: 2.0)")
+    parser.add_argument("--comparisons", action="store_true",
+                        help="also compare the piece move paths, two-phase solvers, parallel search and peephole pass")
+    args = parser.parse_args(argv)
+
+    results = best_of_runs([benchmark_suite(args.count, args.seed) for _ in range(max(args.runs, 1))])
+    print_suite(results)
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+    if args.comparisons:
+        print_comparisons()
+
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        for change in latency_changes(results, baseline, reported_keys, args.tolerance, args.floor):
+            print(f"Slower (not checked): {change}")
+        regressions = compare_to_baseline(results, baseline, args.tolerance, args.floor)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
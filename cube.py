@@ -1,5 +1,8 @@
 import numpy as np
-from data import move_maps, generate_rotation_matrix
+from data import face_locs, str_sort
+from facelets import FaceletCube, position_facelets, parse_string_notation
+from algorithms import CompiledAlgorithm, compile_algorithm
+from move_tables import position_maps, orientation_getters, layer_positions, move_names
 from random import choice
 
 
@@ -22,17 +25,10 @@ class Piece:
         """Rotates the piece in the specified direction, updating its orientation and position
 
         Args:
-            move_type (str): The type of move to perform (using standard cube notation)
+            move_type (str): The type of move to perform (a quarter or half turn in standard cube notation)
         """
-        rotation_matrix = generate_rotation_matrix(move_type)
-        vec = np.array(self.pos)
-        self.pos = tuple(np.dot(rotation_matrix, vec))
-        move_map = move_maps[move_type]
-
-        new_orientation = [*self.orientation]
-        for i, x in enumerate(self.orientation):
-            new_orientation[move_map[i]] = x
-        self.orientation = "".join(new_orientation)
+        self.pos = position_maps[move_type][self.pos]
+        self.orientation = "".join(orientation_getters[move_type](self.orientation))
 
     def __repr__(self):
         return f"{self.type}, {self.orientation}, {self.pos}"
@@ -50,18 +46,12 @@ class RubiksCube:
         "w": "y",
         "y": "w"
     }
-    top_face_locs = [(-1, 1, 1), (0, 1, 1), (1, 1, 1), (-1, 0, 1),
-                     (0, 0, 1), (1, 0, 1), (-1, -1, 1), (0, -1, 1), (1, -1, 1)]
-    front_face_locs = [(-1, -1, 1), (0, -1, 1), (1, -1, 1), (-1, -1, 0),
-                       (0, -1, 0), (1, -1, 0), (-1, -1, -1), (0, -1, -1), (1, -1, -1)]
-    right_face_locs = [(1, -1, 1), (1, 0, 1), (1, 1, 1), (1, -1, 0),
-                       (1, 0, 0), (1, 1, 0), (1, -1, -1), (1, 0, -1), (1, 1, -1)]
-    back_face_locs = [(1, 1, 1), (0, 1, 1), (-1, 1, 1), (1, 1, 0),
-                      (0, 1, 0), (-1, 1, 0), (1, 1, -1), (0, 1, -1), (-1, 1, -1)]
-    left_face_locs = [(-1, 1, 1), (-1, 0, 1), (-1, -1, 1), (-1, 1, 0),
-                      (-1, 0, 0), (-1, -1, 0), (-1, 1, -1), (-1, 0, -1), (-1, -1, -1)]
-    bottom_face_locs = [(-1, -1, -1), (0, -1, -1), (1, -1, -1), (-1, 0, -1),
-                        (0, 0, -1), (1, 0, -1), (-1, 1, -1), (0, 1, -1), (1, 1, -1)]
+    top_face_locs = face_locs["top"]
+    front_face_locs = face_locs["front"]
+    right_face_locs = face_locs["right"]
+    back_face_locs = face_locs["back"]
+    left_face_locs = face_locs["left"]
+    bottom_face_locs = face_locs["bottom"]
 
     def __init__(self):
         """The constructor for RubiksCube. The cube is initialized in the solved state with white on top and red at the front."""
@@ -91,6 +81,77 @@ class RubiksCube:
                                                       (0, -1, -1)), Piece("c", "0rb00y", (1, -1, -1)),
         ]
         self.pieces = [*top_layer, *middle_layer, *bottom_layer]
+        # position -> piece index, the core piece shares its position with the top center and is never looked up
+        self.piece_index = {piece.pos: piece for piece in self.pieces if piece.type != "x"}
+        # facelet array kept in sync with the pieces, used for reading whole faces
+        self.state = FaceletCube()
+
+    @classmethod
+    def from_facelets(cls, facelets: np.ndarray) -> "RubiksCube":
+        """Creates a cube from its facelet colors, placing each piece where its stickers are
+
+        Args:
+            facelets (np.ndarray): The 54 facelet colors as ASCII codes (see facelets.py for the layout)
+
+        Raises:
+            ValueError: If the stickers do not make up a valid set of pieces
+
+        Returns:
+            RubiksCube: A cube in the given state
+        """
+        cube = cls()
+        facelets = np.array(facelets, dtype=np.uint8)
+        colors = facelets.tobytes().decode()
+        pieces_by_colors = {str_sort(piece.orientation): piece for piece in cube.pieces if piece.type != "x"}
+
+        for pos, stickers in position_facelets.items():
+            orientation = ["0"] * 6
+            for face_idx, i in stickers:
+                orientation[face_idx] = colors[i]
+            orientation = "".join(orientation)
+
+            piece = pieces_by_colors.pop(str_sort(orientation), None)
+            if piece is None:
+                raise ValueError("Invalid cube state")
+            piece.pos = pos
+            piece.orientation = orientation
+
+        cube.piece_index = {piece.pos: piece for piece in cube.pieces if piece.type != "x"}
+        cube.state = FaceletCube(facelets)
+        return cube
+
+    @classmethod
+    def from_string_notation(cls, notation: str) -> "RubiksCube":
+        """Creates a cube from string notation (UDFBLR notation), the inverse of to_string_notation
+
+        Args:
+            notation (str): The 54 character string describing the cube
+
+        Raises:
+            ValueError: If the string does not describe a valid set of pieces
+
+        Returns:
+            RubiksCube: A cube in the given state
+        """
+        return cls.from_facelets(parse_string_notation(notation))
+
+    def copy(self) -> "RubiksCube":
+        """Makes an independent copy of the cube without going through the constructor or deepcopy
+
+        Returns:
+            RubiksCube: A cube in the same state
+        """
+        cube = RubiksCube.__new__(RubiksCube)
+        cube.pieces = [Piece(piece.type, piece.orientation, piece.pos) for piece in self.pieces]
+        cube.piece_index = {piece.pos: piece for piece in cube.pieces if piece.type != "x"}
+        cube.state = self.state.copy()
+        return cube
+
+    def __copy__(self) -> "RubiksCube":
+        return self.copy()
+
+    def __deepcopy__(self, memo: dict) -> "RubiksCube":
+        return self.copy()
 
     def get_piece(self, target_pos: tuple[int]) -> Piece:
         """Gets the piece at the specified position
@@ -101,10 +162,7 @@ class RubiksCube:
         Returns:
             Piece: The piece at the specified position
         """
-        for piece in self.pieces:
-            if piece.pos == target_pos:
-                return piece
-        return None
+        return self.piece_index.get(target_pos)
 
     def get_color(self, target_pos: tuple[int], idx: int) -> str:
         """Gets the color of the specified face of the piece at the specified position
@@ -122,44 +180,61 @@ class RubiksCube:
         """Helper function for move that actually performs the move
 
         Args:
-            move_type (str): The type of move to perform (using standard cube notation)
-
-        Raises:
-            Exception: If the move type is invalid
+            move_type (str): The type of move to perform (a quarter or half turn in standard cube notation)
         """
-        for piece in self.pieces:
-            if move_type in ["R", "R'"]:
-                if piece.pos[0] == 1:
-                    piece.move(move_type)
-            elif move_type in ["L", "L'"]:
-                if piece.pos[0] == -1:
-                    piece.move(move_type)
-            elif move_type in ["U", "U'"]:
-                if piece.pos[2] == 1:
-                    piece.move(move_type)
-            elif move_type in ["D", "D'"]:
-                if piece.pos[2] == -1:
-                    piece.move(move_type)
-            elif move_type in ["F", "F'"]:
-                if piece.pos[1] == -1:
-                    piece.move(move_type)
-            elif move_type in ["B", "B'"]:
-                if piece.pos[1] == 1:
-                    piece.move(move_type)
-            else:
-                raise Exception("Invalid move type")
+        # only the 9 pieces in the turned layer are touched, the core piece never moves
+        layer = [self.piece_index[pos] for pos in layer_positions[move_type[0]]]
+        for piece in layer:
+            piece.move(move_type)
+            self.piece_index[piece.pos] = piece
+        self.state.move(move_type)
 
     def move(self, move_type: str):
         """Performs the specified move
 
         Args:
-            move_type (str): The type of move to perform (using standard cube notation)
+            move_type (str): The type of move to perform (using standard cube notation, X2 and X'2 are half turns)
+
+        Raises:
+            ValueError: If the move type is invalid
         """
-        if move_type[-1] == "2":
-            self._move(move_type[:-1])
-            self._move(move_type[:-1])
-        else:
-            self._move(move_type)
+        if move_type not in move_names:
+            raise ValueError("Invalid move type")
+        self._move(move_names[move_type])
+
+    def apply_algorithm(self, algorithm: str | list[str] | CompiledAlgorithm):
+        """Performs a sequence of moves in one step, using its compiled (and cached) permutation
+
+        Args:
+            algorithm (str | list[str] | CompiledAlgorithm): The algorithm as a list of moves, a space separated string or already compiled
+
+        Raises:
+            ValueError: If any move type is invalid
+        """
+        compiled = compile_algorithm(algorithm)
+        moved = [(self.piece_index[pos], new_pos, perm) for pos, (new_pos, perm) in compiled.piece_moves.items()]
+        for piece, new_pos, perm in moved:
+            piece.pos = new_pos
+            piece.orientation = "".join(perm(piece.orientation))
+            self.piece_index[new_pos] = piece
+        self.state.permute(compiled.facelet_perm)
+
+    def state_key(self) -> bytes:
+        """Gets a compact, hashable key of the cube state, usable in dicts and sets
+
+        Returns:
+            bytes: The 54 facelet colors (see facelets.py for the layout)
+        """
+        return self.state.state_key()
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RubiksCube):
+            return NotImplemented
+        return self.state_key() == other.state_key()
+
+    def __hash__(self) -> int:
+        # the hash follows the state, so a cube must not be moved while it is a key in a dict or set
+        return hash(self.state_key())
 
     def get_face(self, face: str) -> list[str]:
         """This function returns the colors of the specified face
@@ -173,20 +248,7 @@ class RubiksCube:
         Returns:
             list[str]: The colors of the specified face
         """
-        if face == "top":
-            return [self.get_color(loc, 0) for loc in self.top_face_locs]
-        elif face == "front":
-            return [self.get_color(loc, 1) for loc in self.front_face_locs]
-        elif face == "right":
-            return [self.get_color(loc, 2) for loc in self.right_face_locs]
-        elif face == "back":
-            return [self.get_color(loc, 3) for loc in self.back_face_locs]
-        elif face == "left":
-            return [self.get_color(loc, 4) for loc in self.left_face_locs]
-        elif face == "bottom":
-            return [self.get_color(loc, 5) for loc in self.bottom_face_locs]
-        else:
-            raise Exception("Invalid face")
+        return self.state.get_face(face)
 
     def get_layer(self, layer: str) -> list[Piece]:
         """Gets the pieces in the specified layer
@@ -210,11 +272,7 @@ class RubiksCube:
         Returns:
             bool: Returns True if the cube is solved, False otherwise
         """
-        for face in ["top", "front", "right", "back", "left", "bottom"]:
-            colors = self.get_face(face)
-            if len(set(colors)) != 1:
-                return False
-        return True
+        return self.state.check_solved()
 
     def to_string_notation(self) -> str:
         """Converts the cube to string notation (UDFBLR notation)
@@ -222,20 +280,7 @@ class RubiksCube:
         Returns:
             str: The string notation of the cube
         """
-        string_notation = ""
-        color_map = {
-            "w": "U",
-            "y": "D",
-            "r": "F",
-            "o": "B",
-            "g": "L",
-            "b": "R"
-        }
-        for face in ["top", "right", "front", "bottom", "left", "back"]:
-            colors = self.get_face(face)
-            for color in colors:
-                string_notation += color_map[color]
-        return string_notation
+        return self.state.to_string_notation()
 
     def scramble(self, num_moves: int = 40):
         """Scrambles the cube
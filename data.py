@@ -108,6 +108,32 @@ move_maps = {
     }
 }
 
+# the layer turned by each face, given as (axis, value): a piece is in the layer if pos[axis] == value
+move_layers = {
+    "R": (0, 1),
+    "L": (0, -1),
+    "U": (2, 1),
+    "D": (2, -1),
+    "F": (1, -1),
+    "B": (1, 1)
+}
+
+# positions of the 9 stickers of each face, read row by row as the face is looked at from the outside
+face_locs = {
+    "top": [(-1, 1, 1), (0, 1, 1), (1, 1, 1), (-1, 0, 1),
+            (0, 0, 1), (1, 0, 1), (-1, -1, 1), (0, -1, 1), (1, -1, 1)],
+    "front": [(-1, -1, 1), (0, -1, 1), (1, -1, 1), (-1, -1, 0),
+              (0, -1, 0), (1, -1, 0), (-1, -1, -1), (0, -1, -1), (1, -1, -1)],
+    "right": [(1, -1, 1), (1, 0, 1), (1, 1, 1), (1, -1, 0),
+              (1, 0, 0), (1, 1, 0), (1, -1, -1), (1, 0, -1), (1, 1, -1)],
+    "back": [(1, 1, 1), (0, 1, 1), (-1, 1, 1), (1, 1, 0),
+             (0, 1, 0), (-1, 1, 0), (1, 1, -1), (0, 1, -1), (-1, 1, -1)],
+    "left": [(-1, 1, 1), (-1, 0, 1), (-1, -1, 1), (-1, 1, 0),
+             (-1, 0, 0), (-1, -1, 0), (-1, 1, -1), (-1, 0, -1), (-1, -1, -1)],
+    "bottom": [(-1, -1, -1), (0, -1, -1), (1, -1, -1), (-1, 0, -1),
+               (0, 0, -1), (1, 0, -1), (-1, 1, -1), (0, 1, -1), (1, 1, -1)]
+}
+
 def generate_rotation_matrix(move_type: str):
     move_to_angle_axis = {
         "R": (-90, "x"),
@@ -0,0 +1,164 @@
+import numpy as np
+from data import move_maps, move_layers, face_locs
+from move_tables import position_maps, move_names
+
+# The cube is stored as 54 facelets, 9 per face, with the faces in the same order as a piece's
+# orientation string (top, front, right, back, left, bottom). Facelet i * 9 + j is the j-th sticker
+# of face i, at position face_locs[face][j]. Each facelet holds the ASCII code of its color.
+
+faces = ["top", "front", "right", "back", "left", "bottom"]
+face_indices = {face: i for i, face in enumerate(faces)}
+
+# (position, face index) of every facelet, and the reverse lookup
+facelet_locs = [(loc, i) for i, face in enumerate(faces) for loc in face_locs[face]]
+facelet_index = {facelet: i for i, facelet in enumerate(facelet_locs)}
+
+# the (face index, facelet index) of every sticker of the piece at each position
+position_facelets = {}
+for i, (loc, face_idx) in enumerate(facelet_locs):
+    position_facelets.setdefault(loc, []).append((face_idx, i))
+
+solved_facelets = np.frombuffer(b"w" * 9 + b"r" * 9 + b"b" * 9 + b"o" * 9 + b"g" * 9 + b"y" * 9,
+                                dtype=np.uint8).copy()
+
+# facelet order and color translation used by to_string_notation (UDFBLR notation)
+notation_order = np.concatenate([np.arange(face_indices[face] * 9, face_indices[face] * 9 + 9)
+                                 for face in ["top", "right", "front", "bottom", "left", "back"]])
+notation_table = bytes.maketrans(b"wyrogb", b"UDFBLR")
+color_table = bytes.maketrans(b"UDFBLR", b"wyrogb")
+
+
+def parse_string_notation(notation: str) -> np.ndarray:
+    """Converts a cube in string notation (UDFBLR notation) to its facelet colors
+
+    Args:
+        notation (str): The 54 character string, as produced by to_string_notation
+
+    Raises:
+        ValueError: If the string is not valid string notation
+
+    Returns:
+        np.ndarray: The 54 facelet colors as ASCII codes
+    """
+    if len(notation) != 54 or set(notation) - set("UDFBLR"):
+        raise ValueError("Invalid string notation")
+    facelets = np.empty(54, dtype=np.uint8)
+    facelets[notation_order] = np.frombuffer(notation.encode().translate(color_table), dtype=np.uint8)
+    return facelets
+
+
+def generate_move_perm(move_type: str) -> np.ndarray:
+    """Generates the facelet permutation of a quarter turn
+
+    Args:
+        move_type (str): The type of move (using standard cube notation)
+
+    Returns:
+        np.ndarray: An index array perm such that facelets[perm] is the state after the move
+    """
+    axis, value = move_layers[move_type[0]]
+    position_map = position_maps[move_type]
+    move_map = move_maps[move_type]
+
+    perm = np.arange(54)
+    for i, (loc, face_idx) in enumerate(facelet_locs):
+        if loc[axis] == value:
+            perm[facelet_index[(position_map[loc], move_map[face_idx])]] = i
+    return perm
+
+
+move_perms = {move_type: generate_move_perm(move_type) for move_type in move_maps}
+for face in move_layers:
+    move_perms[face + "2"] = move_perms[face][move_perms[face]]
+
+
+class FaceletCube:
+    """This is a class that represents the state of a Rubik's cube as an array of 54 facelet colors"""
+
+    def __init__(self, facelets: np.ndarray = None):
+        """Constructor for FaceletCube
+
+        Args:
+            facelets (np.ndarray, optional): The 54 facelet colors as ASCII codes. Defaults to the solved state.
+        """
+        if facelets is None:
+            self.facelets = solved_facelets.copy()
+        else:
+            self.facelets = np.asarray(facelets, dtype=np.uint8)
+        self._key = None
+
+    def copy(self) -> "FaceletCube":
+        """Copies the state, the facelet array is shared since moves replace it instead of writing into it
+
+        Returns:
+            FaceletCube: An independent cube in the same state
+        """
+        state = FaceletCube(self.facelets)
+        state._key = self._key
+        return state
+
+    def permute(self, perm: np.ndarray):
+        """Rearranges the facelets with a single gather
+
+        Args:
+            perm (np.ndarray): An index array such that facelets[perm] is the new state
+        """
+        self.facelets = self.facelets[perm]
+        self._key = None
+
+    def state_key(self) -> bytes:
+        """Gets a compact, hashable key of the state, computed at most once between moves
+
+        Returns:
+            bytes: The 54 facelet colors
+        """
+        if self._key is None:
+            self._key = self.facelets.tobytes()
+        return self._key
+
+    def move(self, move_type: str):
+        """Performs the specified move
+
+        Args:
+            move_type (str): The type of move to perform (using standard cube notation, X2 and X'2 are half turns)
+
+        Raises:
+            ValueError: If the move type is invalid
+        """
+        if move_type not in move_names:
+            raise ValueError("Invalid move type")
+        self.permute(move_perms[move_names[move_type]])
+
+    def get_face(self, face: str) -> list[str]:
+        """Returns the colors of the specified face
+
+        Args:
+            face (str): The face to get the colors of (top, front, right, back, left, bottom)
+
+        Raises:
+            Exception: If the face is invalid
+
+        Returns:
+            list[str]: The colors of the specified face
+        """
+        if face not in face_indices:
+            raise Exception("Invalid face")
+        start = face_indices[face] * 9
+        return list(self.facelets[start:start + 9].tobytes().decode())
+
+    def check_solved(self) -> bool:
+        """Checks if every face has a single color
+
+        Returns:
+            bool: Returns True if the cube is solved, False otherwise
+        """
+        by_face = self.facelets.reshape(6, 9)
+        return bool((by_face == by_face[:, 4:5]).all())
+
+    def to_string_notation(self) -> str:
+        """Converts the cube to string notation (UDFBLR notation)
+
+        Returns:
+            str: The string notation of the cube
+        """
+        return self.facelets[notation_order].tobytes().translate(notation_table).decode()
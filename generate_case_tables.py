@@ -0,0 +1,606 @@
+"""Generates case_tables.json, the tables the beginner's method stages in solver.py look their moves up in.
+
+The step and stage functions below are the original search-by-simulation versions of those stages,
+which find the right moves by trying them on the cube. Every case each stage can run into is set up
+on a cube, solved here once, and the resulting moves are stored under the case's key. Run it from
+the repository root after changing any of these functions:
+
+    python generate_case_tables.py
+"""
+import json
+from collections import deque
+from cube import RubiksCube, Piece
+from data import str_sort, move_layers
+from move_tables import position_maps, orientation_getters
+from solver import (correct_pos_map, correct_orientation_map, case_tables_path, case_tables_version,
+                    piece_case, last_layer_case, convert_algorithm, perform_internal_move,
+                    perform_internal_moves, is_solved, is_right_of, rotate_ccw, rotate_cw)
+
+quarter_turns = ["R", "R'", "L", "L'", "U", "U'", "D", "D'", "F", "F'", "B", "B'"]
+
+
+def white_cross_step(internal_cube: RubiksCube, piece: Piece) -> list[str]:
+    """Performs one iteration of the original white cross loop on the given white edge
+
+    Args:
+        internal_cube (RubiksCube): Cube to work on
+        piece (Piece): The unsolved piece to work on
+
+    Returns:
+        list[str]: The moves that were performed
+    """
+    move_list = []
+
+    if piece.pos[2] == -1:
+        # twist the bottom layer until the white piece is directly below where it needs to go on the top layer
+        other_color = [
+            color for color in piece.orientation if color != "w" and color != "0"][0]
+        while other_color not in internal_cube.get_piece((piece.pos[0], piece.pos[1], 0)).orientation:
+            perform_internal_move(internal_cube, move_list, "D")
+
+        # move it to the top layer
+        front_center_piece = internal_cube.get_piece(
+            (piece.pos[0], piece.pos[1], 0))
+        front_face_color = [
+            color for color in front_center_piece.orientation if color != "0"][0]
+
+        # if white is on the bottom of the piece
+        if piece.orientation[5] == "w":
+            converted_algorithm = convert_algorithm(
+                "F F", front_face_color, "w")
+        else:
+            converted_algorithm = convert_algorithm(
+                "D R F' R'", front_face_color, "w")
+        move_list.extend(converted_algorithm)
+        for move in converted_algorithm:
+            internal_cube.move(move)
+    elif piece.pos[2] == 0:
+        # move it to the bottom layer
+        if piece.pos[0] == 1 and piece.pos[1] == 1:
+            algorithm = "B' D' B"
+        elif piece.pos[0] == 1 and piece.pos[1] == -1:
+            algorithm = "R' D' R"
+        elif piece.pos[0] == -1 and piece.pos[1] == -1:
+            algorithm = "L D L'"
+        else:
+            algorithm = "B D B'"
+
+        perform_internal_moves(
+            internal_cube, move_list, algorithm.split(" "))
+
+    elif piece.pos[2] == 1:
+        # move it to the bottom layer
+        if piece.pos[0] == 1 and piece.pos[1] == 0:
+            algorithm = "R R"
+        elif piece.pos[0] == 0 and piece.pos[1] == -1:
+            algorithm = "F F"
+        elif piece.pos[0] == -1 and piece.pos[1] == 0:
+            algorithm = "L L"
+        else:
+            algorithm = "B B"
+
+        perform_internal_moves(
+            internal_cube, move_list, algorithm.split(" "))
+
+    return move_list
+
+
+def first_layer_step(internal_cube: RubiksCube, piece: Piece) -> list[str]:
+    """Performs one iteration of the original first layer loop on the given white corner
+
+    Args:
+        internal_cube (RubiksCube): Cube to work on
+        piece (Piece): The unsolved piece to work on
+
+    Returns:
+        list[str]: The moves that were performed
+    """
+    move_list = []
+
+    if piece.pos[2] == -1:
+        if piece.orientation[5] != "w":
+            # twist the bottom layer until the white piece is directly below where it needs to go on the top layer
+            correct_pos = correct_pos_map[str_sort(piece.orientation)]
+            while piece.pos[0] != correct_pos[0] or piece.pos[1] != correct_pos[1]:
+                perform_internal_move(internal_cube, move_list, "D")
+
+            first_center_piece = internal_cube.get_piece(
+                (piece.pos[0], 0, 0))
+            second_center_piece = internal_cube.get_piece(
+                (0, piece.pos[1], 0))
+
+            first_outward_dir = [i for i in range(
+                6) if first_center_piece.orientation[i] != "0"][0]
+            second_outward_dir = [i for i in range(
+                6) if second_center_piece.orientation[i] != "0"][0]
+            first_color = first_center_piece.orientation[first_outward_dir]
+            second_color = second_center_piece.orientation[second_outward_dir]
+            if piece.orientation[first_outward_dir] == first_color:
+                if is_right_of(first_center_piece, second_center_piece):
+                    converted_algorithm = convert_algorithm(
+                        "L D L'", first_color, "w")
+                else:
+                    converted_algorithm = convert_algorithm(
+                        "R' D' R", first_color, "w")
+            else:
+                if is_right_of(first_center_piece, second_center_piece):
+                    converted_algorithm = convert_algorithm(
+                        "R' D' R", second_color, "w")
+                else:
+                    converted_algorithm = convert_algorithm(
+                        "L D L'", second_color, "w")
+
+            perform_internal_moves(
+                internal_cube, move_list, converted_algorithm)
+        else:
+            # twist the bottom layer until the white piece is directly below where it needs to go on the top layer
+            correct_pos = correct_pos_map[str_sort(piece.orientation)]
+            while piece.pos[0] != correct_pos[0] or piece.pos[1] != correct_pos[1]:
+                perform_internal_move(internal_cube, move_list, "D")
+
+            first_center_piece = internal_cube.get_piece(
+                (piece.pos[0], 0, 0))
+            second_center_piece = internal_cube.get_piece(
+                (0, piece.pos[1], 0))
+
+            first_outward_dir = [i for i in range(
+                6) if first_center_piece.orientation[i] != "0"][0]
+            second_outward_dir = [i for i in range(
+                6) if second_center_piece.orientation[i] != "0"][0]
+            first_color = first_center_piece.orientation[first_outward_dir]
+            second_color = second_center_piece.orientation[second_outward_dir]
+
+            if is_right_of(first_center_piece, second_center_piece):
+                converted_algorithm = convert_algorithm(
+                    "R' D R", second_color, "w")
+            else:
+                converted_algorithm = convert_algorithm(
+                    "R' D R", first_color, "w")
+
+            perform_internal_moves(
+                internal_cube, move_list, converted_algorithm)
+    else:
+        first_center_piece = internal_cube.get_piece((piece.pos[0], 0, 0))
+        second_center_piece = internal_cube.get_piece((0, piece.pos[1], 0))
+
+        first_outward_dir = [i for i in range(
+            6) if first_center_piece.orientation[i] != "0"][0]
+        second_outward_dir = [i for i in range(
+            6) if second_center_piece.orientation[i] != "0"][0]
+        first_color = first_center_piece.orientation[first_outward_dir]
+        second_color = second_center_piece.orientation[second_outward_dir]
+
+        if is_right_of(first_center_piece, second_center_piece):
+            converted_algorithm = convert_algorithm(
+                "R' D R", second_color, "w")
+        else:
+            converted_algorithm = convert_algorithm(
+                "R' D R", first_color, "w")
+
+        perform_internal_moves(
+            internal_cube, move_list, converted_algorithm)
+
+    return move_list
+
+
+def second_layer_step(internal_cube: RubiksCube, piece: Piece) -> list[str]:
+    """Performs one iteration of the original second layer loop on the given middle layer edge
+
+    Args:
+        internal_cube (RubiksCube): Cube to work on
+        piece (Piece): The unsolved piece to work on
+
+    Returns:
+        list[str]: The moves that were performed
+    """
+    move_list = []
+
+    if piece.pos[2] == -1:
+        # get the color that is not facing down
+        other_color = [color for i, color in enumerate(
+            piece.orientation) if color != "0" and i != 5][0]
+        # twist the bottom layer until the center piece with the other color is directly below the edge piece
+        while other_color not in internal_cube.get_piece((piece.pos[0], piece.pos[1], 0)).orientation:
+            perform_internal_move(internal_cube, move_list, "D")
+
+        # get the current center piece
+        current_center_piece = internal_cube.get_piece(
+            (piece.pos[0], piece.pos[1], 0))
+        current_color = [
+            color for color in current_center_piece.orientation if color != "0"][0]
+
+        # get the center piece on both the faces left and right of the current face
+        first_center_piece = internal_cube.get_piece(
+            (*rotate_ccw(piece.pos[:2]), 0))
+        second_center_piece = internal_cube.get_piece(
+            (*rotate_cw(piece.pos[:2]), 0))
+        first_color = [
+            color for color in first_center_piece.orientation if color != "0"][0]
+        second_color = [
+            color for color in second_center_piece.orientation if color != "0"][0]
+
+        converted_algorithm = None
+        if piece.orientation[5] == first_color:
+            if is_right_of(first_center_piece, current_center_piece):
+                converted_algorithm = convert_algorithm(
+                    "U' L' U L U F U' F'", current_color, "y")
+            else:
+                converted_algorithm = convert_algorithm(
+                    "U R U' R' U' F' U F", current_color, "y")
+        elif piece.orientation[5] == second_color:
+            if is_right_of(second_center_piece, current_center_piece):
+                converted_algorithm = convert_algorithm(
+                    "U' L' U L U F U' F'", current_color, "y")
+            else:
+                converted_algorithm = convert_algorithm(
+                    "U R U' R' U' F' U F", current_color, "y")
+
+        perform_internal_moves(
+            internal_cube, move_list, converted_algorithm)
+    else:
+        first_center_piece = internal_cube.get_piece((piece.pos[0], 0, 0))
+        second_center_piece = internal_cube.get_piece((0, piece.pos[1], 0))
+        first_color = [
+            color for color in first_center_piece.orientation if color != "0"][0]
+        second_color = [
+            color for color in second_center_piece.orientation if color != "0"][0]
+        if is_right_of(first_center_piece, second_center_piece):
+            converted_algorithm = convert_algorithm(
+                "U R U' R' U' F' U F", first_color, "y")
+        else:
+            converted_algorithm = convert_algorithm(
+                "U' L' U L U F U' F'", first_color, "y")
+
+        perform_internal_moves(
+            internal_cube, move_list, converted_algorithm)
+
+    return move_list
+
+
+def search_yellow_cross(internal_cube: RubiksCube) -> list[str]:
+    move_list = []
+    algorithm = None
+
+    # get all yellow edges
+    top_edge = internal_cube.get_piece((0, 1, -1))
+    right_edge = internal_cube.get_piece((-1, 0, -1))
+    bottom_edge = internal_cube.get_piece((0, -1, -1))
+    left_edge = internal_cube.get_piece((1, 0, -1))
+    # get number of yellow edges facing down
+    num_facing_down = sum([1 for edge in [
+                          top_edge, right_edge, bottom_edge, left_edge] if edge.orientation[5] == "y"])
+
+    # yellow dot on top
+    if num_facing_down == 0:
+        algorithm = "F R U R' U' R U R' U' F' U' F R U R' U' F'"
+    # yellow line or L on top
+    elif num_facing_down == 2:
+        # line cases
+        if top_edge.orientation[5] == "y" and bottom_edge.orientation[5] == "y":
+            algorithm = "U F R U R' U' F'"
+        elif left_edge.orientation[5] == "y" and right_edge.orientation[5] == "y":
+            algorithm = "F R U R' U' F'"
+        # L cases
+        elif top_edge.orientation[5] == "y" and left_edge.orientation[5] == "y":
+            algorithm = "F R U R' U' R U R' U' F'"
+        elif top_edge.orientation[5] == "y" and right_edge.orientation[5] == "y":
+            algorithm = "U' F R U R' U' R U R' U' F'"
+        elif bottom_edge.orientation[5] == "y" and right_edge.orientation[5] == "y":
+            algorithm = "U U F R U R' U' F' F R U R' U' F'"
+        elif bottom_edge.orientation[5] == "y" and left_edge.orientation[5] == "y":
+            algorithm = "U F R U R' U' R U R' U' F'"
+
+    if algorithm:
+        converted_algorithm = convert_algorithm(algorithm, "r", "y")
+        perform_internal_moves(internal_cube, move_list, converted_algorithm)
+
+    # assert that the yellow cross is solved
+    f2l = [piece for piece in internal_cube.pieces if piece.pos[2] != -1]
+    bottom_layer_edges = [
+        piece for piece in internal_cube.pieces if piece.pos[2] == -1 and piece.type == "e"]
+    if not all([piece.pos == correct_pos_map[str_sort(piece.orientation)] and piece.orientation == correct_orientation_map[str_sort(piece.orientation)] for piece in f2l] and [piece.orientation[5] == "y" for piece in bottom_layer_edges]):
+        raise Exception("Yellow cross is not solved")
+
+    return move_list
+
+
+def search_yellow_edges(internal_cube: RubiksCube) -> list[str]:
+    move_list = []
+
+    for _ in range(4):
+        perform_internal_move(internal_cube, move_list, "D")
+
+        # get all yellow edges
+        top_edge = internal_cube.get_piece((0, 1, -1))
+        right_edge = internal_cube.get_piece((-1, 0, -1))
+        bottom_edge = internal_cube.get_piece((0, -1, -1))
+        left_edge = internal_cube.get_piece((1, 0, -1))
+
+        is_correct = {"top": False, "right": False,
+                      "bottom": False, "left": False}
+        if correct_pos_map[str_sort(top_edge.orientation)] == top_edge.pos:
+            is_correct["top"] = True
+        if correct_pos_map[str_sort(right_edge.orientation)] == right_edge.pos:
+            is_correct["right"] = True
+        if correct_pos_map[str_sort(bottom_edge.orientation)] == bottom_edge.pos:
+            is_correct["bottom"] = True
+        if correct_pos_map[str_sort(left_edge.orientation)] == left_edge.pos:
+            is_correct["left"] = True
+
+        num_correct = sum([1 for correct in is_correct if is_correct[correct]])
+        # if number of correct is 4, then we are done
+        if num_correct == 4:
+            return move_list
+        # if number of correct is 2, then we must position the cube so that those are on the top and right
+        elif num_correct == 2:
+            if is_correct["top"] and is_correct["right"]:
+                # do nothing
+                pass
+            elif is_correct["right"] and is_correct["bottom"]:
+                perform_internal_move(internal_cube, move_list, "D'")
+            elif is_correct["bottom"] and is_correct["left"]:
+                perform_internal_move(internal_cube, move_list, "D")
+                perform_internal_move(internal_cube, move_list, "D")
+            elif is_correct["left"] and is_correct["top"]:
+                perform_internal_move(internal_cube, move_list, "D")
+            else:
+                if is_correct["top"] and is_correct["bottom"]:
+                    algorithm = "R U R' U R U U R' U'"
+                    converted_algorithm = convert_algorithm(
+                        algorithm, "r", "y")
+                    perform_internal_moves(
+                        internal_cube, move_list, converted_algorithm)
+                elif is_correct["right"] and is_correct["left"]:
+                    algorithm = "R U R' U R U U R' U'"
+                    converted_algorithm = convert_algorithm(
+                        algorithm, "r", "y")
+                    perform_internal_moves(
+                        internal_cube, move_list, converted_algorithm)
+            # perform algorithm
+            algorithm = "R U R' U R U U R'"
+            converted_algorithm = convert_algorithm(algorithm, "r", "y")
+            perform_internal_moves(
+                internal_cube, move_list, converted_algorithm)
+
+            # get all yellow edges
+            top_edge = internal_cube.get_piece((0, 1, -1))
+            right_edge = internal_cube.get_piece((-1, 0, -1))
+            bottom_edge = internal_cube.get_piece((0, -1, -1))
+            left_edge = internal_cube.get_piece((1, 0, -1))
+
+            # twist the bottom layer until they are all correct (if one is correct, then they all are)
+            num_loops = 0
+            continue_flag = False
+            while not (correct_pos_map[str_sort(top_edge.orientation)] == top_edge.pos and correct_pos_map[str_sort(right_edge.orientation)] == right_edge.pos and correct_pos_map[str_sort(bottom_edge.orientation)] == bottom_edge.pos and correct_pos_map[str_sort(left_edge.orientation)] == left_edge.pos):
+                if num_loops > 4:
+                    continue_flag = True
+                    break
+
+                perform_internal_move(internal_cube, move_list, "D")
+                num_loops += 1
+            if continue_flag:
+                continue
+            break
+        else:
+            # raise Exception("Invalid cube state")
+            pass
+
+    f2l = [piece for piece in internal_cube.pieces if piece.pos[2] != -1]
+    bottom_layer_edges = [
+        piece for piece in internal_cube.pieces if piece.pos[2] == -1 and piece.type == "e"]
+
+    if not all([piece.pos == correct_pos_map[str_sort(piece.orientation)] and piece.orientation == correct_orientation_map[str_sort(piece.orientation)] for piece in f2l + bottom_layer_edges]):
+        raise Exception("Yellow edges not in correct position")
+
+    return move_list
+
+
+def search_yellow_corner_position(internal_cube: RubiksCube) -> list[str]:
+    move_list = []
+
+    # get all yellow corners, order is top left (r as front and y as top) and goes clockwise
+    corners = [internal_cube.get_piece((1, 1, -1)), internal_cube.get_piece(
+        (-1, 1, -1)), internal_cube.get_piece((-1, -1, -1)), internal_cube.get_piece((1, -1, -1))]
+    # get number of yellow corners in correct position
+    is_correct = [corner.pos == correct_pos_map[str_sort(
+        corner.orientation)] for corner in corners]
+    num_correct = sum([1 for correct in is_correct if correct])
+    if num_correct == 4:
+        return move_list
+    elif num_correct == 0 or num_correct == 1:
+        # while number of correct is not 4
+        num_loops = 0
+        while num_correct != 4:
+            if num_loops > 8:
+                raise Exception("Invalid cube state")
+
+            algorithm = "U R U' L' U R' U' L"
+            if is_correct[0]:
+                converted_algorithm = convert_algorithm(algorithm, "o", "y")
+            elif is_correct[1]:
+                converted_algorithm = convert_algorithm(algorithm, "g", "y")
+            elif is_correct[2]:
+                converted_algorithm = convert_algorithm(algorithm, "r", "y")
+            else:
+                converted_algorithm = convert_algorithm(algorithm, "b", "y")
+            perform_internal_moves(
+                internal_cube, move_list, converted_algorithm)
+
+            corners = [internal_cube.get_piece((1, 1, -1)), internal_cube.get_piece(
+                (-1, 1, -1)), internal_cube.get_piece((-1, -1, -1)), internal_cube.get_piece((1, -1, -1))]
+            is_correct = [corner.pos == correct_pos_map[str_sort(
+                corner.orientation)] for corner in corners]
+            num_correct = sum([1 for correct in is_correct if correct])
+
+            num_loops += 1
+    else:
+        raise Exception("Invalid cube state")
+
+    # assert that the yellow corners are in the correct position
+    if not all([piece.pos == correct_pos_map[str_sort(piece.orientation)] for piece in internal_cube.pieces if piece.type == "c" and "y" in piece.orientation]):
+        raise Exception("Yellow corners not in correct position")
+
+    return move_list
+
+
+def search_yellow_corner_orientation(internal_cube: RubiksCube) -> list[str]:
+    move_list = []
+    outer_num_loops = 0
+    while not all([piece.orientation[5] == "y" for piece in internal_cube.pieces if piece.type == "c" and "y" in piece.orientation]):
+        if outer_num_loops > 4:
+            raise Exception("Invalid cube state")
+        anchor_piece = internal_cube.get_piece((-1, -1, -1))
+        # if the anchor piece is not in the right orientation, then we need to correct it
+        inner_num_loops = 0
+        while anchor_piece.orientation[5] != "y":
+            if inner_num_loops > 6:
+                raise Exception("Invalid cube state")
+            algorithm = "R' D' R D"
+            converted_algorithm = convert_algorithm(algorithm, "r", "y")
+            perform_internal_moves(
+                internal_cube, move_list, converted_algorithm)
+            inner_num_loops += 1
+        internal_cube.move("D'")
+        move_list.append("D'")
+        outer_num_loops += 1
+
+    num_loops = 0
+    while not is_solved(internal_cube):
+        if num_loops > 4:
+            raise Exception("Invalid cube state")
+        perform_internal_move(internal_cube, move_list, "D'")
+        num_loops += 1
+
+    if not is_solved(internal_cube):
+        raise Exception("Cube not solved after yellow corner orientation")
+
+    return move_list
+
+
+def piece_setups(colors: str) -> dict[tuple, list[str]]:
+    """Finds a short move sequence from solved that puts a piece in each state it can be in
+
+    Args:
+        colors (str): The sorted colors of the piece, as returned by str_sort(piece.orientation)
+
+    Returns:
+        dict[tuple, list[str]]: The moves that lead to each (position, orientation) of the piece
+    """
+    start = (correct_pos_map[colors], correct_orientation_map[colors])
+    setups = {start: []}
+    queue = deque([start])
+    while queue:
+        pos, orientation = queue.popleft()
+        for move_type in quarter_turns:
+            axis, value = move_layers[move_type[0]]
+            if pos[axis] != value:
+                continue
+            state = (position_maps[move_type][pos], "".join(orientation_getters[move_type](orientation)))
+            if state not in setups:
+                setups[state] = setups[(pos, orientation)] + [move_type]
+                queue.append(state)
+    return setups
+
+
+def generate_step_table(step, pieces: list[str], include) -> dict[str, str]:
+    """Runs a step on every unsolved state of the given pieces
+
+    Args:
+        step: The step function, called with a cube and the piece to solve
+        pieces (list[str]): The sorted colors of the pieces the step solves
+        include: A function of the piece's position that says if the stage can see the piece there
+
+    Returns:
+        dict[str, str]: The moves of the step for each case
+    """
+    table = {}
+    for colors in pieces:
+        for (pos, orientation), setup in piece_setups(colors).items():
+            if (pos, orientation) == (correct_pos_map[colors], correct_orientation_map[colors]) or not include(pos):
+                continue
+            cube = RubiksCube()
+            cube.apply_algorithm(setup)
+            piece = cube.get_piece(pos)
+            case = piece_case(piece)
+            table[case] = " ".join(step(cube, piece))
+    return table
+
+
+def last_layer_states() -> list[RubiksCube]:
+    """Finds every state with the first two layers solved, by applying last layer algorithms until no new state comes up
+
+    Returns:
+        list[RubiksCube]: Every reachable last layer state
+    """
+    generators = [
+        ["D"],
+        convert_algorithm("R U R' U R U U R'", "r", "y"),
+        convert_algorithm("F R U R' U' F'", "r", "y"),
+        convert_algorithm("U R U' L' U R' U' L", "r", "y")
+    ]
+    solved = RubiksCube()
+    states = {solved.state_key(): solved}
+    queue = deque([solved])
+    while queue:
+        cube = queue.popleft()
+        for algorithm in generators:
+            new_cube = cube.copy()
+            new_cube.apply_algorithm(algorithm)
+            if new_cube.state_key() not in states:
+                states[new_cube.state_key()] = new_cube
+                queue.append(new_cube)
+    return list(states.values())
+
+
+def generate_last_layer_tables(states: list[RubiksCube]) -> dict[str, dict[str, str]]:
+    """Runs the last layer stages on every last layer state, checking that each case always gets the same moves
+
+    Args:
+        states (list[RubiksCube]): The states to solve, as returned by last_layer_states
+
+    Raises:
+        Exception: If two states with the same case key needed different moves
+
+    Returns:
+        dict[str, dict[str, str]]: For each stage, the moves for each case
+    """
+    stages = [
+        ("yellow_cross", search_yellow_cross),
+        ("yellow_edges", search_yellow_edges),
+        ("yellow_corner_position", search_yellow_corner_position),
+        ("yellow_corner_orientation", search_yellow_corner_orientation)
+    ]
+    tables = {stage: {} for stage, _ in stages}
+    for cube in states:
+        cube = cube.copy()
+        for stage, search in stages:
+            case = last_layer_case(cube, stage)
+            algorithm = " ".join(search(cube))
+            if tables[stage].setdefault(case, algorithm) != algorithm:
+                raise Exception(f"Case {case} of {stage} is ambiguous")
+    return tables
+
+
+def main():
+    white_edges = sorted({str_sort(p.orientation) for p in RubiksCube().pieces if p.type == "e" and "w" in p.orientation})
+    white_corners = sorted({str_sort(p.orientation) for p in RubiksCube().pieces if p.type == "c" and "w" in p.orientation})
+    middle_edges = sorted({str_sort(p.orientation) for p in RubiksCube().pieces
+                           if p.type == "e" and "w" not in p.orientation and "y" not in p.orientation})
+
+    stages = {
+        "white_cross": generate_step_table(white_cross_step, white_edges, lambda pos: True),
+        "first_layer": generate_step_table(first_layer_step, white_corners, lambda pos: True),
+        "second_layer": generate_step_table(second_layer_step, middle_edges, lambda pos: pos[2] != 1)
+    }
+    states = last_layer_states()
+    print("Found", len(states), "last layer states")
+    stages.update(generate_last_layer_tables(states))
+
+    for stage, cases in stages.items():
+        print(stage + ":", len(cases), "cases")
+    with open(case_tables_path, "w") as f:
+        json.dump({"version": case_tables_version, "stages": stages}, f, indent=1, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Opt-in profiling of the beginner's method solver.
+
+A Profiler is a context manager. While it is active, it wraps solve_cube, the stage functions in solver.py and
+the hot methods of RubiksCube with counting versions. When it exits, the original functions are put back, so
+code that runs without a profiler pays nothing for it. Only moves made inside solver.solve_cube are counted, so
+call it through the module (a solve_cube imported before the profiler started is not wrapped).
+
+    with Profiler() as profiler:
+        for cube in cubes:
+            solver.solve_cube(cube, in_place=False)
+    print(profiler.to_json())
+"""
+import json
+import time
+from functools import wraps
+import numpy as np
+import solver
+from algorithms import compile_algorithm
+from cube import RubiksCube
+from solution import stage_names
+
+counter_names = ["moves", "piece_lookups", "loop_iterations"]
+metric_names = ["seconds", "raw_moves", "optimized_moves"] + counter_names
+
+# the solver function of each stage, in the order of stage_names
+stage_functions = ["solve_white_cross", "solve_first_layer", "solve_second_layer", "solve_yellow_cross",
+                   "solve_yellow_edges", "solve_yellow_corner_position", "solve_yellow_corner_orientation"]
+
+
+class Profiler:
+    """This is a class that records the time and counters of every stage solved while it is active"""
+
+    def __init__(self):
+        """Constructor for Profiler"""
+
+        # one dict per solve, stage name -> metric name -> value
+        self.records = []
+        self.current_stage = None
+        self.originals = []
+
+    def __enter__(self) -> "Profiler":
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.uninstall()
+
+    def patch(self, owner, name: str, wrapper):
+        original = getattr(owner, name)
+        self.originals.append((owner, name, original))
+        setattr(owner, name, wraps(original)(wrapper(original)))
+
+    def install(self):
+        """Wraps the solver stages and the counted RubiksCube methods"""
+
+        if self.originals:
+            return
+        self.patch(solver, "solve_cube", self.solve_wrapper)
+        for stage_name, function_name in zip(stage_names, stage_functions):
+            self.patch(solver, function_name, lambda original, stage_name=stage_name: self.stage_wrapper(original, stage_name))
+        self.patch(solver, "optimize_stage", self.optimize_wrapper)
+        # each iteration of a stage loop looks up the case of one piece (or of the last layer)
+        self.patch(solver, "lookup_case", lambda original: self.counting_wrapper(original, "loop_iterations"))
+        self.patch(RubiksCube, "get_piece", lambda original: self.counting_wrapper(original, "piece_lookups"))
+        self.patch(RubiksCube, "_move", lambda original: self.counting_wrapper(original, "moves"))
+        self.patch(RubiksCube, "apply_algorithm", self.algorithm_wrapper)
+
+    def uninstall(self):
+        """Puts back the original functions"""
+
+        for owner, name, original in reversed(self.originals):
+            setattr(owner, name, original)
+        self.originals.clear()
+        self.current_stage = None
+
+    def solve_wrapper(self, original):
+        def wrapper(*args, **kwargs):
+            try:
+                return original(*args, **kwargs)
+            finally:
+                # moves made after the solve (replaying the solution, say) belong to no stage
+                self.current_stage = None
+        return wrapper
+
+    def stage_wrapper(self, original, stage_name: str):
+        def wrapper(*args, **kwargs):
+            # the first stage starts a new solve
+            if stage_name == stage_names[0] or not self.records:
+                self.records.append({})
+            stage = dict.fromkeys(metric_names, 0)
+            self.records[-1][stage_name] = stage
+            self.current_stage = stage
+            start = time.perf_counter()
+            algorithm = original(*args, **kwargs)
+            stage["seconds"] = time.perf_counter() - start
+            stage["raw_moves"] = len(algorithm)
+            return algorithm
+        return wrapper
+
+    def optimize_wrapper(self, original):
+        def wrapper(algorithm, *args, **kwargs):
+            optimized = original(algorithm, *args, **kwargs)
+            if self.current_stage is not None:
+                self.current_stage["optimized_moves"] = len(optimized)
+            return optimized
+        return wrapper
+
+    def counting_wrapper(self, original, counter: str):
+        def wrapper(*args, **kwargs):
+            if self.current_stage is not None:
+                self.current_stage[counter] += 1
+            return original(*args, **kwargs)
+        return wrapper
+
+    def algorithm_wrapper(self, original):
+        def wrapper(cube, algorithm):
+            compiled = compile_algorithm(algorithm)
+            if self.current_stage is not None:
+                self.current_stage["moves"] += len(compiled)
+            return original(cube, compiled)
+        return wrapper
+
+    def totals(self) -> list[dict[str, float]]:
+        """Adds up the metrics of every stage for each solve
+
+        Returns:
+            list[dict[str, float]]: The metric totals of each solve
+        """
+        return [{metric: sum(stage[metric] for stage in record.values()) for metric in metric_names}
+                for record in self.records]
+
+    def summary(self, bins: int = 10) -> dict:
+        """Aggregates the recorded solves into statistics and histograms
+
+        Args:
+            bins (int, optional): The number of histogram bins. Defaults to 10.
+
+        Returns:
+            dict: For each stage (and "total"), for each metric, the mean, min, max, p50, p95 and a histogram
+        """
+        samples = {name: [record[name] for record in self.records if name in record] for name in stage_names}
+        samples["total"] = self.totals()
+        return {
+            "solves": len(self.records),
+            "stages": {name: {metric: describe([stage[metric] for stage in stages], bins) for metric in metric_names}
+                       for name, stages in samples.items() if stages}
+        }
+
+    def to_json(self, path: str = None, include_records: bool = False) -> str:
+        """Exports the summary as JSON
+
+        Args:
+            path (str, optional): A file to write the JSON to. Defaults to None (only returned).
+            include_records (bool, optional): Whether to include the metrics of every solve. Defaults to False.
+
+        Returns:
+            str: The JSON text
+        """
+        data = self.summary()
+        if include_records:
+            data["records"] = self.records
+        text = json.dumps(data, indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+
+def describe(values: list[float], bins: int = 10) -> dict:
+    """Summarizes a list of samples
+
+    Args:
+        values (list[float]): The samples
+        bins (int, optional): The number of histogram bins. Defaults to 10.
+
+    Returns:
+        dict: The mean, min, max, p50 and p95 of the samples, and a histogram given as bin edges and counts
+    """
+    values = np.asarray(values, dtype=float)
+    counts, edges = np.histogram(values, bins=bins)
+    return {
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()}
+    }
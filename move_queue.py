@@ -0,0 +1,214 @@
+"""Frame-driven playback of move sequences for the simulation.
+
+The queue holds a timeline of turns and a position in it. Simulation calls update with the frame time, gets
+back the turns that finished in that frame (to apply to the view) and reads turning to draw the turn in
+progress. Nothing here depends on the game engine, so playback is the same at any frame rate.
+"""
+from algorithms import parse_algorithm, move_amounts, inverse_move
+
+min_speed = .25
+max_speed = 8.0
+
+
+def turn_amount(move: str) -> int:
+    # counter-clockwise turns are negative, so they animate the short way round
+    amount = move_amounts[move[1:]]
+    return amount - 4 if amount == 3 else amount
+
+
+def coalesce_moves(moves: list[str]) -> list[tuple[str, int]]:
+    """Merges each pair of equal quarter turns into one half turn, so it is animated as a single 180 degree turn
+
+    Args:
+        moves (list[str]): The moves
+
+    Returns:
+        list[tuple[str, int]]: The turns, each with the index of its first move in moves
+    """
+    steps = []
+    i = 0
+    while i < len(moves):
+        move = moves[i]
+        if move[-1] != "2" and i + 1 < len(moves) and moves[i + 1] == move:
+            steps.append((move[0] + "2", i))
+            i += 2
+        else:
+            steps.append((move, i))
+            i += 1
+    return steps
+
+
+class MoveQueue:
+    """This is a class that plays a timeline of turns forwards or backwards, advanced by the frame time"""
+
+    def __init__(self, turn_seconds: float = .2, max_seconds: float = None):
+        """Constructor for MoveQueue
+
+        Args:
+            turn_seconds (float, optional): How long a quarter turn takes at speed 1, half turns take 1.5 times as long. Defaults to .2.
+            max_seconds (float, optional): The longest a loaded sequence may take at speed 1, longer sequences are played faster. Defaults to None (no limit).
+        """
+        self.turn_seconds = turn_seconds
+        self.max_seconds = max_seconds
+        self.speed = 1.0
+        self.clear()
+
+    def clear(self):
+        """Drops the timeline, without finishing anything"""
+
+        self.steps = []
+        self.moves = []
+        self.position = 0
+        self.progress = 0.0
+        self.direction = 1
+        self.playing = False
+        self.stop_at = None
+        self.scale = 1.0
+        self.finished_moves = []
+
+    def load(self, moves: list[str], play: bool = True):
+        """Replaces the timeline with a sequence of moves
+
+        Args:
+            moves (list[str]): The moves, quarter or half turns
+            play (bool, optional): Whether to start playing straight away. Defaults to True.
+
+        Raises:
+            ValueError: If any move type is invalid
+        """
+        self.clear()
+        self.moves = list(parse_algorithm(moves))
+        self.steps = coalesce_moves(self.moves)
+        if self.max_seconds is not None:
+            total = sum(self.step_seconds(move) for move, _ in self.steps)
+            self.scale = max(total / self.max_seconds, 1.0)
+        self.playing = play
+
+    def extend(self, moves: list[str]):
+        """Adds moves to the end of the timeline and plays forwards to reach them
+
+        Args:
+            moves (list[str]): The moves, quarter or half turns
+        """
+        self.play()
+        start = len(self.moves)
+        moves = list(parse_algorithm(moves))
+        self.moves += moves
+        # a turn that has not started yet can still be merged with the new moves
+        first_open = self.position + (1 if self.progress > 0 else 0)
+        if len(self.steps) > first_open and self.steps[-1][0][-1] != "2" and moves and self.steps[-1][0] == moves[0]:
+            self.steps[-1] = (moves[0][0] + "2", self.steps[-1][1])
+            moves = moves[1:]
+            start += 1
+        self.steps += [(move, start + index) for move, index in coalesce_moves(moves)]
+
+    def step_seconds(self, move: str) -> float:
+        return self.turn_seconds * (1.5 if move[-1] == "2" else 1.0)
+
+    @property
+    def current_step(self) -> int | None:
+        """The index of the step that is (or would next be) animated in the current direction, or None at the end"""
+        index = self.position if self.direction > 0 else self.position - 1
+        return index if 0 <= index < len(self.steps) else None
+
+    @property
+    def turning(self) -> tuple[str, float] | None:
+        """The move being animated and how much of it is done (from 0 to 1), or None if nothing is turning"""
+        index = self.current_step
+        if index is None or (not self.playing and self.progress == 0):
+            return None
+        move = self.steps[index][0]
+        return (move if self.direction > 0 else inverse_move(move)), self.progress
+
+    @property
+    def move_index(self) -> int:
+        """The index (in the loaded moves) of the first move of the step being animated, len(moves) past the end"""
+        index = self.current_step
+        return len(self.moves) if index is None else self.steps[index][1]
+
+    @property
+    def at_end(self) -> bool:
+        return self.position == len(self.steps) and self.progress == 0
+
+    def set_speed(self, speed: float):
+        self.speed = min(max(speed, min_speed), max_speed)
+
+    def play(self, direction: int = 1):
+        """Plays until the end (or the start, backwards)
+
+        Args:
+            direction (int, optional): 1 to play forwards, -1 to play backwards. Defaults to 1.
+        """
+        self.set_direction(direction)
+        self.stop_at = None
+        self.playing = True
+
+    def pause(self):
+        self.playing = False
+
+    def rewind(self):
+        self.play(-1)
+
+    def step(self, direction: int = 1):
+        """Plays a single turn and pauses, a turn that was paused halfway is finished instead
+
+        Args:
+            direction (int, optional): 1 to step forwards, -1 to step backwards. Defaults to 1.
+        """
+        self.set_direction(direction)
+        self.stop_at = self.position + direction
+        self.playing = True
+
+    def set_direction(self, direction: int):
+        if direction != self.direction:
+            # a turn cannot be played back from halfway, so it is finished first
+            self.finish_turn()
+            self.direction = direction
+
+    def finish_turn(self):
+        if self.progress > 0:
+            self.progress = 0.0
+            self.advance()
+
+    def advance(self):
+        move = self.steps[self.current_step][0]
+        self.finished_moves.append(move if self.direction > 0 else inverse_move(move))
+        self.position += self.direction
+        if self.stop_at is not None and self.position == self.stop_at:
+            self.playing = False
+            self.stop_at = None
+
+    def fast_forward(self):
+        """Finishes every turn left in the timeline at once, they are returned by the next update"""
+
+        self.set_direction(1)
+        self.finish_turn()
+        while self.position < len(self.steps):
+            self.advance()
+        self.playing = False
+
+    def update(self, dt: float) -> list[str]:
+        """Advances playback by the time of a frame
+
+        Args:
+            dt (float): The seconds since the last frame
+
+        Returns:
+            list[str]: The moves that finished (including any from step, fast_forward or a change of direction), in order
+        """
+        remaining = dt * self.speed
+        while self.playing and remaining > 0:
+            index = self.current_step
+            if index is None:
+                self.playing = False
+                break
+            seconds = self.step_seconds(self.steps[index][0]) / self.scale
+            needed = (1 - self.progress) * seconds
+            if remaining < needed:
+                self.progress += remaining / seconds
+                break
+            remaining -= needed
+            self.progress = 0.0
+            self.advance()
+        finished, self.finished_moves = self.finished_moves, []
+        return finished
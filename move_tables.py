@@ -0,0 +1,62 @@
+from itertools import product
+from operator import itemgetter
+import numpy as np
+from data import move_maps, move_layers, generate_rotation_matrix
+
+# Lookup tables for every quarter and half turn, built once at import time so that moving a piece
+# does not need to rebuild a rotation matrix or do any arithmetic.
+#
+# position_maps[move][pos] is the position a piece at pos is rotated to.
+# orientation_perms[move][i] is the index of the old orientation character that ends up at index i.
+# orientation_getters[move] applies that permutation to an orientation string, returning a tuple of characters.
+# layer_positions[face] lists the 9 positions in the layer turned by that face.
+# move_names maps every accepted spelling of a move (including X'2) to its key in the tables above.
+
+positions = list(product((-1, 0, 1), repeat=3))
+
+
+def generate_position_map(move_type: str) -> dict[tuple[int], tuple[int]]:
+    """Generates the position lookup of a quarter turn
+
+    Args:
+        move_type (str): The type of move (using standard cube notation)
+
+    Returns:
+        dict[tuple[int], tuple[int]]: A map from each of the 27 positions to its position after the rotation
+    """
+    rotation_matrix = generate_rotation_matrix(move_type)
+    return {pos: tuple(int(x) for x in np.dot(rotation_matrix, pos)) for pos in positions}
+
+
+def generate_orientation_perm(move_type: str) -> tuple[int]:
+    """Generates the orientation permutation of a quarter turn
+
+    Args:
+        move_type (str): The type of move (using standard cube notation)
+
+    Returns:
+        tuple[int]: The index of the old orientation character for each index of the new orientation
+    """
+    move_map = move_maps[move_type]
+    perm = [0] * 6
+    for i in range(6):
+        perm[move_map[i]] = i
+    return tuple(perm)
+
+
+position_maps = {move_type: generate_position_map(move_type) for move_type in move_maps}
+orientation_perms = {move_type: generate_orientation_perm(move_type) for move_type in move_maps}
+
+# a half turn is the quarter turn composed with itself
+for face in move_layers:
+    position_maps[face + "2"] = {pos: position_maps[face][position_maps[face][pos]] for pos in positions}
+    orientation_perms[face + "2"] = tuple(orientation_perms[face][i] for i in orientation_perms[face])
+
+orientation_getters = {move_type: itemgetter(*perm) for move_type, perm in orientation_perms.items()}
+
+layer_positions = {face: [pos for pos in positions if pos[axis] == value]
+                   for face, (axis, value) in move_layers.items()}
+
+move_names = {move_type: move_type for move_type in position_maps}
+for face in move_layers:
+    move_names[face + "'2"] = face + "2"
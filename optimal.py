@@ -0,0 +1,340 @@
+"""An optimal solver: IDA* over the face-turn metric (every quarter or half turn counts as one move).
+
+The heuristic is the maximum of several pattern databases, each an exact distance from solved for part of
+the cube. The 48 symmetries of the cube are used in two ways. The corner database is stored reduced by the
+16 symmetries that keep the U-D axis in place, which shrinks it from 88 million entries to 6 million. The
+remaining factor of 3 (which axis is the U-D axis) is used by looking up the edge databases from all three
+axes, tracking the cube as seen with each axis pointing up.
+"""
+import time
+from functools import lru_cache
+from itertools import permutations
+import numpy as np
+from cube import RubiksCube
+from facelets import solved_facelets
+from symmetry import symmetry_matrices, symmetry_move_maps, transform_facelets
+from table_store import TableStore
+from twophase import (search_moves, move_cubies, corner_facelets, cubie_state, twist_coord, flip_coord, slice_coord,
+                      corners_coord, rank_permutations, generate_twist_moves, load_table as load_twophase_table,
+                      get_tables as get_twophase_tables)
+
+# bump when a change to this module changes the contents of a table, so the saved files are regenerated
+tables_version = 1
+table_store = TableStore()
+
+# the symmetries that keep the U-D axis in place, identity first
+ud_symmetries = [s for s, matrix in enumerate(symmetry_matrices) if abs(matrix[2, 2]) == 1]
+# for each axis, a rotation that turns it into the U-D axis (the identity, then the R-L and F-B axes)
+axis_symmetries = [next(s for s, matrix in enumerate(symmetry_matrices)
+                        if round(np.linalg.det(matrix)) == 1 and abs(matrix[2, axis]) == 1)
+                   for axis in (2, 0, 1)]
+# axis_move_maps[k][m] is what move m does to the cube as seen with axis k pointing up
+axis_move_maps = [[search_moves.index(symmetry_move_maps[s][move_type]) for move_type in search_moves]
+                  for s in axis_symmetries]
+
+corner_facelet_array = np.array(corner_facelets)
+ud_color_codes = np.array([ord("w"), ord("y")])
+
+
+def corners_to_facelets(cp: np.ndarray, co: np.ndarray) -> np.ndarray:
+    """Builds facelet arrays for many corner states, with every edge solved
+
+    Args:
+        cp (np.ndarray): An N x 8 array of the cubie at each corner position
+        co (np.ndarray): An N x 8 array of the twist of each corner
+
+    Returns:
+        np.ndarray: An N x 54 array of facelet colors
+    """
+    colors = solved_facelets[corner_facelet_array]
+    facelets = np.tile(solved_facelets, (len(cp), 1))
+    rows = np.arange(len(cp))
+    for i in range(8):
+        for k in range(3):
+            facelets[rows, corner_facelet_array[i][(k + co[:, i]) % 3]] = colors[cp[:, i], k]
+    return facelets
+
+
+def corners_from_facelets(facelets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Reads the corner permutation and orientation off many facelet arrays
+
+    Args:
+        facelets (np.ndarray): An N x 54 array of facelet colors
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The cubie at each corner position and the twist of each corner (N x 8 each)
+    """
+    color_bits = np.zeros(256, dtype=np.int64)
+    for i, color in enumerate(np.unique(solved_facelets)):
+        color_bits[color] = 1 << i
+    corner_lookup = np.zeros(64, dtype=np.int64)
+    for j, fs in enumerate(corner_facelet_array):
+        corner_lookup[color_bits[solved_facelets[fs]].sum()] = j
+
+    colors = facelets[:, corner_facelet_array]
+    cp = corner_lookup[color_bits[colors].sum(axis=2)]
+    co = np.isin(colors, ud_color_codes).argmax(axis=2)
+    return cp, co
+
+
+def generate_corner_perm_moves() -> np.ndarray:
+    perms = np.array(list(permutations(range(8))), dtype=np.int64)
+    table = np.zeros((len(perms), 18), dtype=np.uint16)
+    for m, (mcp, _, _, _) in enumerate(move_cubies):
+        table[:, m] = rank_permutations(perms[:, mcp])
+    return table
+
+
+def generate_corner_perm_conj() -> np.ndarray:
+    """Generates the corner permutation of every permutation conjugated by each U-D symmetry
+
+    Returns:
+        np.ndarray: A 40320 x 16 table, [perm, u] is the permutation seen through symmetry ud_symmetries[u]
+    """
+    perms = np.array(list(permutations(range(8))), dtype=np.int64)
+    facelets = corners_to_facelets(perms, np.zeros_like(perms))
+    table = np.zeros((len(perms), len(ud_symmetries)), dtype=np.uint16)
+    for u, s in enumerate(ud_symmetries):
+        table[:, u] = rank_permutations(corners_from_facelets(transform_facelets(facelets, s))[0])
+    return table
+
+
+def generate_twist_conj() -> np.ndarray:
+    """Generates the twist of every twist conjugated by each U-D symmetry
+
+    These symmetries keep U/D stickers on the U and D faces, so the conjugated twist does not depend on
+    the corner permutation.
+
+    Returns:
+        np.ndarray: A 2187 x 16 table, [twist, u] is the twist seen through symmetry ud_symmetries[u]
+    """
+    co = (np.arange(2187)[:, None] // 3 ** np.arange(6, -1, -1)) % 3
+    co = np.hstack([co, (-co.sum(axis=1, keepdims=True)) % 3])
+    facelets = corners_to_facelets(np.tile(np.arange(8), (2187, 1)), co)
+    table = np.zeros((2187, len(ud_symmetries)), dtype=np.uint16)
+    for u, s in enumerate(ud_symmetries):
+        new_co = corners_from_facelets(transform_facelets(facelets, s))[1]
+        table[:, u] = new_co[:, :7] @ 3 ** np.arange(6, -1, -1)
+    return table
+
+
+class CornerClasses:
+    """This is a class that groups the corner permutations into classes of permutations equal up to a U-D symmetry"""
+
+    def __init__(self, perm_conj: np.ndarray):
+        """Constructor for CornerClasses
+
+        Args:
+            perm_conj (np.ndarray): The table generated by generate_corner_perm_conj
+        """
+        perm_conj = np.asarray(perm_conj)
+        # the representative of a class is its smallest permutation
+        rep_of_perm = perm_conj.min(axis=1)
+        self.reps = np.unique(rep_of_perm)
+        self.perm_class = np.searchsorted(self.reps, rep_of_perm)
+        self.perm_sym = perm_conj.argmin(axis=1)
+        # the symmetries that map each representative to itself
+        self.stabilizers = perm_conj[self.reps] == self.reps[:, None]
+
+    def __len__(self) -> int:
+        return len(self.reps)
+
+
+def generate_corner_prune(corner_perm_moves: np.ndarray, twist_moves: np.ndarray, twist_conj: np.ndarray,
+                          classes: CornerClasses) -> np.ndarray:
+    """Finds the distance from solved of every corner state, up to a U-D symmetry, with a breadth-first search
+
+    An entry is class * 2187 + twist, where the twist is that of the state turned so its permutation is the class
+    representative. When the representative is symmetric, every twist equivalent under its symmetries is set too,
+    so a state can be looked up through any of the symmetries that take it to the representative.
+
+    Returns:
+        np.ndarray: The number of moves needed to solve the corners
+    """
+    corner_perm_moves, twist_moves, twist_conj = (np.asarray(t, dtype=np.int64) for t in (corner_perm_moves, twist_moves, twist_conj))
+    table = np.full(len(classes) * 2187, -1, dtype=np.int8)
+
+    def fill(c: np.ndarray, t: np.ndarray) -> np.ndarray:
+        entries = [c * 2187 + t]
+        for u in range(1, len(ud_symmetries)):
+            symmetric = classes.stabilizers[c, u]
+            entries.append(c[symmetric] * 2187 + twist_conj[t[symmetric], u])
+        entries = np.unique(np.concatenate(entries))
+        return entries[table[entries] < 0]
+
+    frontier = fill(classes.perm_class[[0]], np.array([0]))
+    depth = 0
+    table[frontier] = depth
+    while len(frontier):
+        c, t = np.divmod(frontier, 2187)
+        perms = corner_perm_moves[classes.reps[c]].ravel()
+        twists = twist_moves[t].ravel()
+        new_t = twist_conj[twists, classes.perm_sym[perms]]
+        frontier = fill(classes.perm_class[perms], new_t)
+        depth += 1
+        table[frontier] = depth
+    return table
+
+
+class Tables:
+    """This is a class that holds every table the optimal search needs, in the form that is fastest to index from Python"""
+
+    def __init__(self):
+        twophase_tables = get_twophase_tables()
+        twist_moves = load_twophase_table("twist_moves", generate_twist_moves)
+        corner_perm_moves = table_store.load("optimal_corner_perm_moves", tables_version, generate_corner_perm_moves)
+        perm_conj = table_store.load("optimal_corner_perm_conj", tables_version, generate_corner_perm_conj)
+        twist_conj = table_store.load("optimal_twist_conj", tables_version, generate_twist_conj)
+        classes = CornerClasses(perm_conj)
+
+        self.twist_moves = twophase_tables.twist_moves
+        self.flip_moves = twophase_tables.flip_moves
+        self.slice_moves = twophase_tables.slice_moves
+        self.slice_twist_prune = twophase_tables.slice_twist_prune
+        self.slice_flip_prune = twophase_tables.slice_flip_prune
+        self.corner_perm_moves = corner_perm_moves.tolist()
+        self.perm_class = classes.perm_class.tolist()
+        self.perm_sym = classes.perm_sym.tolist()
+        self.twist_conj = twist_conj.tolist()
+        self.corner_prune = memoryview(table_store.load("optimal_corner_prune", tables_version, lambda: generate_corner_prune(
+            corner_perm_moves, twist_moves, twist_conj, classes)))
+
+
+@lru_cache(maxsize=None)
+def get_tables() -> Tables:
+    """Loads (or generates) the tables the first time a solve needs them
+
+    Returns:
+        Tables: The shared tables
+    """
+    return Tables()
+
+
+class IDAStarSearch:
+    """This is a class that holds the state of one optimal search"""
+
+    def __init__(self, cube: RubiksCube, max_nodes: int = None, timeout: float = None, cancel=None):
+        """Constructor for IDAStarSearch
+
+        Args:
+            cube (RubiksCube): The cube to solve, it is not changed
+            max_nodes (int, optional): The number of nodes after which the search gives up. Defaults to None (no limit).
+            timeout (float, optional): The number of seconds after which the search gives up. Defaults to None (no limit).
+            cancel (optional): An event (anything with is_set) that stops the search when set. Defaults to None.
+        """
+        self.tables = get_tables()
+        self.cube = cube
+        self.max_nodes = max_nodes
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.cancel = cancel
+        self.nodes = 0
+        self.moves = []
+        self.stopped = False
+
+        # the coordinates of the cube as seen with each axis pointing up
+        self.start = []
+        for s in axis_symmetries:
+            _, co, ep, eo = cubie_state(transform_facelets(cube.state.facelets, s))
+            self.start.append((twist_coord(co), flip_coord(eo), slice_coord(ep)))
+        self.start_corners = corners_coord(cubie_state(cube.state.facelets)[0])
+
+    def heuristic(self, axes: list[tuple[int, int, int]], corners: int) -> int:
+        tables = self.tables
+        twist = axes[0][0]
+        h = tables.corner_prune[tables.perm_class[corners] * 2187 + tables.twist_conj[twist][tables.perm_sym[corners]]]
+        for twist, flip, slice_ in axes:
+            h = max(h, tables.slice_twist_prune[slice_ * 2187 + twist], tables.slice_flip_prune[slice_ * 2048 + flip])
+        return h
+
+    def run(self) -> tuple[list[str] | None, int]:
+        """Searches with an increasing bound until a solution is found or the budget runs out
+
+        Returns:
+            tuple[list[str] | None, int]: The optimal solution (or None if the budget ran out) and the last bound searched,
+                which is a lower bound on the solution length when no solution was found
+        """
+        bound = self.heuristic(self.start, self.start_corners)
+        while True:
+            moves = self.run_bound(bound)
+            if moves is not None:
+                return moves, bound
+            if self.stopped:
+                return None, bound
+            bound += 1
+
+    def run_bound(self, bound: int, last_face: int = -1) -> list[str] | None:
+        """Searches every sequence of exactly bound moves (one iteration of IDA*)
+
+        Args:
+            bound (int): The number of moves
+            last_face (int, optional): The face of the move made before this cube, which the first move must not repeat. Defaults to -1.
+
+        Returns:
+            list[str] | None: A solution of bound moves, or None if there is none (or the search was stopped)
+        """
+        if self.heuristic(self.start, self.start_corners) > bound:
+            return None
+        if self.search(self.start, self.start_corners, bound, last_face):
+            return [search_moves[m] for m in self.moves]
+        return None
+
+    def search(self, axes: list[tuple[int, int, int]], corners: int, togo: int, last_face: int) -> bool:
+        self.nodes += 1
+        if togo == 0:
+            # the databases don't track the edge permutation, so check the candidate on the cube itself
+            cube = self.cube.copy()
+            cube.apply_algorithm([search_moves[m] for m in self.moves])
+            return cube.check_solved()
+        if self.nodes & 1023 == 0 and ((self.max_nodes is not None and self.nodes >= self.max_nodes) or
+                                       (self.deadline is not None and time.monotonic() > self.deadline) or
+                                       (self.cancel is not None and self.cancel.is_set())):
+            self.stopped = True
+        if self.stopped:
+            return False
+
+        tables = self.tables
+        twist_moves, flip_moves, slice_moves = tables.twist_moves, tables.flip_moves, tables.slice_moves
+        for m in range(18):
+            face = m // 3
+            # turning the same face twice in a row, or opposite faces in both orders, is redundant
+            if face == last_face or face == last_face - 3:
+                continue
+            new_axes = []
+            for (twist, flip, slice_), move_map in zip(axes, axis_move_maps):
+                k = move_map[m]
+                new_axes.append((twist_moves[twist][k], flip_moves[flip][k], slice_moves[slice_][k]))
+            new_corners = tables.corner_perm_moves[corners][m]
+            if self.heuristic(new_axes, new_corners) >= togo:
+                continue
+            self.moves.append(m)
+            if self.search(new_axes, new_corners, togo - 1, face):
+                return True
+            self.moves.pop()
+        return False
+
+
+def solve_optimal(cube: RubiksCube, max_nodes: int = None, timeout: float = None) -> tuple[list[str] | None, dict]:
+    """Finds a shortest solution in the face-turn metric
+
+    Args:
+        cube (RubiksCube): The cube to solve, it is not changed
+        max_nodes (int, optional): The number of nodes after which the search gives up. Defaults to None (no limit).
+        timeout (float, optional): The number of seconds after which the search gives up. Defaults to None (no limit).
+
+    Raises:
+        ValueError: If the cube is not solvable
+
+    Returns:
+        tuple[list[str] | None, dict]: The solution (None if the budget ran out), and statistics: the nodes expanded,
+            the seconds taken, the nodes per second and the length searched up to (a lower bound when unsolved)
+    """
+    search = IDAStarSearch(cube, max_nodes, timeout)
+    start = time.perf_counter()
+    moves, depth = search.run()
+    seconds = time.perf_counter() - start
+    return moves, {
+        "nodes": search.nodes,
+        "seconds": seconds,
+        "nodes_per_second": search.nodes / seconds if seconds > 0 else 0.0,
+        "depth": depth
+    }
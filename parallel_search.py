@@ -0,0 +1,277 @@
+"""Runs the native searches on several cores by splitting the root of the search tree.
+
+Every sequence of the first one or two moves (the same sequences the serial search would try) becomes a task
+for a process pool. The workers load the pruning tables through the table store, so they all map the same
+files and share one physical copy. When a worker finds a solution, a shared event tells the others to stop,
+and the optimal search adds up the nodes of every worker in a shared counter, so max_nodes holds for the pool.
+The two-phase searches share their length limit instead, so every subtree looks for solutions shorter than the
+best one found in any of them.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import optimal
+import twophase
+from algorithms import expand_half_turns, simplify_algorithm
+from cube import RubiksCube
+from twophase import search_moves, cubie_state, apply_move
+
+# set in each worker process by init_worker
+cancel_event = None
+node_counter = None
+length_limit = None
+
+
+def init_worker(event, counter=None, limit=None):
+    global cancel_event, node_counter, length_limit
+    cancel_event = event
+    node_counter = counter
+    length_limit = limit
+
+
+class SharedBudget:
+    """This is a class that stops a search in a worker when the cancel event is set or the pool used up its nodes"""
+
+    def __init__(self, search: optimal.IDAStarSearch, max_nodes: int | None):
+        """Constructor for SharedBudget
+
+        Args:
+            search (optimal.IDAStarSearch): The search whose nodes are added to the shared counter
+            max_nodes (int | None): The number of nodes of every worker together after which the search gives up
+        """
+        self.search = search
+        self.max_nodes = max_nodes
+        self.counted = 0
+
+    def is_set(self) -> bool:
+        # the search calls this every 1024 nodes, so the counter is only locked that often
+        with node_counter.get_lock():
+            node_counter.value += self.search.nodes - self.counted
+            total = node_counter.value
+        self.counted = self.search.nodes
+        return cancel_event.is_set() or (self.max_nodes is not None and total >= self.max_nodes)
+
+
+def move_prefixes(depth: int, last_face: int = -1) -> list[list[int]]:
+    """Lists every sequence of moves the searches would try as their first moves
+
+    Args:
+        depth (int): The number of moves
+        last_face (int, optional): The face of the move before the sequence. Defaults to -1 (none).
+
+    Returns:
+        list[list[int]]: The move sequences, as indices into search_moves
+    """
+    if depth == 0:
+        return [[]]
+    prefixes = []
+    for m in range(18):
+        face = m // 3
+        if face == last_face or face == last_face - 3:
+            continue
+        prefixes += [[m] + rest for rest in move_prefixes(depth - 1, face)]
+    return prefixes
+
+
+def remaining_time(deadline: float | None) -> float | None:
+    # deadlines are wall-clock times, so they mean the same thing in every process
+    return None if deadline is None else max(deadline - time.time(), 0.0)
+
+
+def optimal_subtree(facelets: bytes, prefix: list[int], bound: int, max_nodes: int | None,
+                    deadline: float | None) -> tuple[list[str] | None, int, bool]:
+    """Searches the sequences of exactly bound moves that start with a prefix (runs in a worker)
+
+    Args:
+        facelets (bytes): The facelets of the cube to solve
+        prefix (list[int]): The first moves, as indices into search_moves
+        bound (int): The total number of moves
+        max_nodes (int | None): The number of nodes of every worker together after which the worker gives up
+        deadline (float | None): The wall-clock time after which the worker gives up
+
+    Returns:
+        tuple[list[str] | None, int, bool]: The solution (including the prefix) or None, the nodes expanded,
+            and whether the search was stopped before it finished
+    """
+    if cancel_event.is_set():
+        return None, 0, True
+    cube = RubiksCube.from_facelets(np.frombuffer(facelets, dtype=np.uint8))
+    cube.apply_algorithm([search_moves[m] for m in prefix])
+    search = optimal.IDAStarSearch(cube, timeout=remaining_time(deadline))
+    budget = SharedBudget(search, max_nodes)
+    search.cancel = budget
+    moves = search.run_bound(bound - len(prefix), prefix[-1] // 3 if prefix else -1)
+    budget.is_set()
+    if moves is not None:
+        moves = [search_moves[m] for m in prefix] + moves
+    return moves, search.nodes, search.stopped
+
+
+def solve_optimal_parallel(cube: RubiksCube, workers: int = None, split_depth: int = 2, max_nodes: int = None,
+                           timeout: float = None) -> tuple[list[str] | None, dict]:
+    """Finds a shortest solution in the face-turn metric, searching each bound on several cores
+
+    Args:
+        cube (RubiksCube): The cube to solve, it is not changed
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        split_depth (int, optional): The number of first moves each task is given. Defaults to 2.
+        max_nodes (int, optional): The number of nodes after which the search gives up. Defaults to None (no limit).
+        timeout (float, optional): The number of seconds after which the search gives up. Defaults to None (no limit).
+
+    Returns:
+        tuple[list[str] | None, dict]: The solution (None if the budget ran out) and the same statistics as
+            optimal.solve_optimal, plus the number of workers
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    deadline = None if timeout is None else time.time() + timeout
+    # loading the tables here generates any missing ones once, instead of in every worker
+    search = optimal.IDAStarSearch(cube)
+    bound = search.heuristic(search.start, search.start_corners)
+    facelets = cube.state.facelets.tobytes()
+
+    event = multiprocessing.Event()
+    counter = multiprocessing.Value("q", 0)
+    nodes = 0
+    solution = None
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(event, counter)) as executor:
+        while True:
+            event.clear()
+            # tasks that were cancelled before they started never added to the counter
+            counter.value = nodes
+            futures = [executor.submit(optimal_subtree, facelets, prefix, bound, max_nodes, deadline)
+                       for prefix in move_prefixes(min(split_depth, bound))]
+            stopped = False
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                moves, task_nodes, task_stopped = future.result()
+                nodes += task_nodes
+                stopped = stopped or task_stopped
+                if moves is not None and solution is None:
+                    solution = moves
+                if max_nodes is not None and nodes >= max_nodes:
+                    stopped = True
+                if solution is not None or stopped:
+                    # the first solution at this bound is optimal, the remaining subtrees can stop
+                    event.set()
+                    for other in futures:
+                        other.cancel()
+            if solution is not None or stopped:
+                break
+            bound += 1
+
+    seconds = time.perf_counter() - start
+    return solution, {
+        "nodes": nodes,
+        "seconds": seconds,
+        "nodes_per_second": nodes / seconds if seconds > 0 else 0.0,
+        "depth": bound,
+        "workers": workers
+    }
+
+
+class SharedLimitSearch(twophase.TwoPhaseSearch):
+    """This is a class that runs a two-phase search after a prefix (in a worker), sharing its length limit with
+    the searches of the other prefixes"""
+
+    def __init__(self, state: tuple, prefix: list[int], max_length: int, timeout: float, cancel=None):
+        """Constructor for SharedLimitSearch
+
+        Args:
+            state (tuple): The cubie state after the prefix, as returned by cubie_state
+            prefix (list[int]): The first moves, as indices into search_moves
+            max_length (int): The total number of moves (including the prefix) to stop at
+            timeout (float): The number of seconds after which the best solution so far is returned
+            cancel (optional): An event (anything with is_set) that stops the search when set. Defaults to None.
+        """
+        super().__init__(state, max_length - len(prefix), timeout, prefix[-1] // 3 if prefix else -1, cancel)
+        self.prefix_length = len(prefix)
+        self.pull_limit()
+
+    def pull_limit(self):
+        # length_limit holds the length of the best solution of any prefix, including that prefix
+        self.limit = min(self.limit, length_limit.value - self.prefix_length)
+        # a short enough solution was found somewhere, so this search only refines it like the serial one does
+        if self.found_nodes is None and self.limit <= self.max_length:
+            self.found_nodes = self.nodes
+
+    def start_phase2(self):
+        self.pull_limit()
+        best = self.best
+        super().start_phase2()
+        if self.best is not best:
+            with length_limit.get_lock():
+                length_limit.value = min(length_limit.value, self.prefix_length + len(self.best))
+
+
+def twophase_subtree(facelets: bytes, prefix: list[int], max_length: int, deadline: float) -> list[str] | None:
+    """Runs a two-phase search on the cube after a prefix (runs in a worker)
+
+    Args:
+        facelets (bytes): The facelets of the cube to solve
+        prefix (list[int]): The first moves, as indices into search_moves
+        max_length (int): The total number of moves to stop at
+        deadline (float): The wall-clock time after which the best solution so far is returned
+
+    Returns:
+        list[str] | None: The best solution found (including the prefix), or None if no solution shorter than
+            the shared limit was found
+    """
+    if cancel_event.is_set():
+        return None
+    state = cubie_state(np.frombuffer(facelets, dtype=np.uint8))
+    for m in prefix:
+        state = apply_move(state, m)
+    moves = SharedLimitSearch(state, prefix, max_length, remaining_time(deadline), cancel_event).run()
+    return None if moves is None else simplify_algorithm([search_moves[m] for m in prefix] + moves, True)
+
+
+def solve_twophase_parallel(cube: RubiksCube, workers: int = None, split_depth: int = 1, max_length: int = 22,
+                            timeout: float = 10.0, half_turns: bool = True) -> list[str]:
+    """Solves the cube with the two-phase algorithm on several cores
+
+    Args:
+        cube (RubiksCube): The cube to solve, it is not changed
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        split_depth (int, optional): The number of first moves each task is given. Defaults to 1.
+        max_length (int, optional): Return the first solution with at most this many moves. Defaults to 22.
+        timeout (float, optional): Seconds after which the best solution found so far is returned. Defaults to 10.0.
+        half_turns (bool, optional): If False, half turns are written as two quarter turns. Defaults to True.
+
+    Raises:
+        ValueError: If the cube is not solvable
+        TimeoutError: If no solution was found in time
+
+    Returns:
+        list[str]: The moves that solve the cube
+    """
+    if cube.check_solved():
+        return []
+    workers = workers or os.cpu_count() or 1
+    deadline = time.time() + timeout
+    cubie_state(cube.state.facelets)
+    # loading the tables here generates any missing ones once, instead of in every worker
+    twophase.get_tables()
+    facelets = cube.state.facelets.tobytes()
+
+    event = multiprocessing.Event()
+    # longer than any solution the searches would return, lowered by the workers as they find shorter ones
+    limit = multiprocessing.Value("i", 31 + split_depth)
+    best = None
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(event, None, limit)) as executor:
+        futures = [executor.submit(twophase_subtree, facelets, prefix, max_length, deadline)
+                   for prefix in move_prefixes(split_depth)]
+        # every search stops refining on its own once a short enough solution was found in any subtree
+        for future in as_completed(futures):
+            moves = future.result()
+            if moves is not None and (best is None or len(moves) < len(best)):
+                best = moves
+
+    if best is None:
+        raise TimeoutError("No solution found within the time limit")
+    if not half_turns:
+        best = expand_half_turns(best)
+    return best
@@ -0,0 +1,168 @@
+"""A peephole optimizer that replaces windows of an algorithm with shorter sequences that do the same thing.
+
+The table of short sequences is built by a breadth-first search from solved over the quarter turns, keyed by
+the state the sequence leaves a solved cube in. Two sequences that leave a solved cube in the same state have
+the same effect on any cube, so a window whose net effect is in the table can be swapped for the table's
+sequence whenever that is shorter.
+
+Windows that repeat a block of moves (like the corner twisting R' D' R D R' D' R D) are also shortened using
+the order of the block: k repeats of a block of order n do the same as n - k repeats of its inverse.
+"""
+import math
+from functools import lru_cache
+import numpy as np
+from algorithms import parse_algorithm, compile_moves, inverse_moves
+from facelets import solved_facelets, move_perms
+from table_store import TableStore
+
+# bump when a change to this module changes the contents of the table, so the saved file is regenerated
+tables_version = 1
+table_store = TableStore()
+
+quarter_turns = [face + suffix for face in "RLUDFB" for suffix in ("", "'")]
+# the longest sequences in the table, every state up to this many quarter turns from solved is included
+identity_depth = 5
+
+
+def generate_identity_table(depth: int = identity_depth) -> np.ndarray:
+    """Finds a shortest quarter turn sequence for every state within depth moves of solved
+
+    Returns:
+        np.ndarray: One row per state, the 54 facelets of the state followed by the sequence as indices into
+            quarter_turns, padded with 255
+    """
+    identity = np.arange(54)
+    seen = {solved_facelets.tobytes()}
+    rows = []
+    frontier = [(identity, ())]
+    for _ in range(depth):
+        next_frontier = []
+        for perm, sequence in frontier:
+            for m, move_type in enumerate(quarter_turns):
+                new_perm = perm[move_perms[move_type]]
+                state = solved_facelets[new_perm]
+                key = state.tobytes()
+                if key in seen:
+                    continue
+                seen.add(key)
+                new_sequence = sequence + (m,)
+                rows.append(np.concatenate([state, new_sequence, [255] * (depth - len(new_sequence))]))
+                next_frontier.append((new_perm, new_sequence))
+        frontier = next_frontier
+    return np.array(rows, dtype=np.uint8)
+
+
+@lru_cache(maxsize=None)
+def get_identity_table() -> dict[bytes, tuple[str]]:
+    """Loads (or generates) the table the first time it is needed
+
+    Returns:
+        dict[bytes, tuple[str]]: A shortest quarter turn sequence for each state key, the solved state maps to no moves
+    """
+    rows = table_store.load("peephole_identities", tables_version, generate_identity_table)
+    states = np.ascontiguousarray(rows[:, :54]).tobytes()
+    table = {solved_facelets.tobytes(): ()}
+    for i, sequence in enumerate(rows[:, 54:].tolist()):
+        table[states[i * 54:(i + 1) * 54]] = tuple(quarter_turns[m] for m in sequence if m != 255)
+    return table
+
+
+def permutation_order(perm: np.ndarray) -> int:
+    """Finds how many times a permutation has to be applied to get back to the identity
+
+    Args:
+        perm (np.ndarray): The permutation
+
+    Returns:
+        int: The order of the permutation
+    """
+    seen = np.zeros(len(perm), dtype=bool)
+    order = 1
+    for start in range(len(perm)):
+        length = 0
+        i = start
+        while not seen[i]:
+            seen[i] = True
+            i = perm[i]
+            length += 1
+        if length:
+            order = order * length // math.gcd(order, length)
+    return order
+
+
+@lru_cache(maxsize=4096)
+def block_order(block: tuple[str]) -> int:
+    return permutation_order(compile_moves(block).facelet_perm)
+
+
+def table_replacement(moves: list[str], i: int, max_window: int) -> tuple[int, list[str]] | None:
+    """Finds the window starting at i whose table sequence saves the most moves
+
+    Returns:
+        tuple[int, list[str]] | None: The end of the window and its replacement, or None if no window can be shortened
+    """
+    table = get_identity_table()
+    perm = np.arange(54)
+    best = None
+    for j in range(i + 1, min(i + max_window, len(moves)) + 1):
+        perm = perm[move_perms[moves[j - 1]]]
+        replacement = table.get(solved_facelets[perm].tobytes())
+        if replacement is not None and len(replacement) < j - i and \
+                (best is None or j - i - len(replacement) > best[0] - i - len(best[1])):
+            best = (j, list(replacement))
+    return best
+
+
+def power_replacement(moves: list[str], i: int, max_block: int) -> tuple[int, list[str]] | None:
+    """Finds the run of repeats of a block starting at i whose rewrite saves the most moves
+
+    Returns:
+        tuple[int, list[str]] | None: The end of the run and its replacement, or None if no run can be shortened
+    """
+    best = None
+    for size in range(1, min(max_block, (len(moves) - i) // 2) + 1):
+        block = moves[i:i + size]
+        repeats = 1
+        while moves[i + repeats * size:i + (repeats + 1) * size] == block:
+            repeats += 1
+        if repeats < 2:
+            continue
+
+        order = block_order(tuple(block))
+        repeats_left = repeats % order
+        if order - repeats_left < repeats_left:
+            replacement = inverse_moves(block) * (order - repeats_left)
+        else:
+            replacement = block * repeats_left
+        j = i + repeats * size
+        if len(replacement) < j - i and (best is None or j - i - len(replacement) > best[0] - i - len(best[1])):
+            best = (j, replacement)
+    return best
+
+
+def peephole_optimize(algorithm: str | list[str], max_window: int = 12) -> list[str]:
+    """Replaces windows that have a shorter equivalent (in the table, or as fewer repeats of a block) until none is left
+
+    Args:
+        algorithm (str | list[str]): The algorithm as a list of moves or a space separated string
+        max_window (int, optional): The longest window that is looked up in the table, blocks are up to half as long. Defaults to 12.
+
+    Raises:
+        ValueError: If any move type is invalid
+
+    Returns:
+        list[str]: The optimized algorithm, never longer than the input
+    """
+    moves = list(parse_algorithm(algorithm))
+    i = 0
+    while i < len(moves):
+        candidates = [candidate for candidate in (table_replacement(moves, i, max_window),
+                                                  power_replacement(moves, i, max_window // 2)) if candidate is not None]
+        if not candidates:
+            i += 1
+            continue
+        j, replacement = max(candidates, key=lambda candidate: candidate[0] - len(candidate[1]))
+        moves[i:j] = replacement
+        # the new moves can complete windows that start before them
+        i = max(i - max_window, 0)
+    return moves
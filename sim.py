@@ -1,42 +1,117 @@
-import kociemba
+import numpy as np
 from ursina import *
+from background_solve import BackgroundSolver
 from cube import RubiksCube
-from solver import solve_cube
+from data import move_layers
+from facelets import FaceletCube, facelet_locs
+from move_queue import MoveQueue, turn_amount
+from solution import SolveResult, stage_names
+from solution_cache import SolutionCache
+from twophase import cubie_state
+
+# the outward normal of each face, in the order of facelets.faces (cube coordinates, z is up and -y is front)
+face_normals = np.array([(0, 0, 1), (0, -1, 0), (1, 0, 0), (0, 1, 0), (-1, 0, 0), (0, 0, -1)])
+# half the width of a sticker, the cubies are 1 wide so this leaves a dark gap between stickers
+sticker_size = .45
+
+
+def face_quad(center: np.ndarray, axis: int, size: float) -> list[np.ndarray]:
+    # the 4 corners of a square facing along an axis, in order around the square
+    u = np.eye(3)[(axis + 1) % 3] * size
+    v = np.eye(3)[(axis + 2) % 3] * size
+    return [center - u - v, center + u - v, center + u + v, center - u + v]
+
+
+def generate_sticker_vertices() -> np.ndarray:
+    """Finds the corners of every sticker and of the dark backing, in scene coordinates (y is up and -z is front)
+
+    The backing is a black square just behind each sticker that fills the gaps around it, and a black square
+    across the cube at the inner side of each face layer, which closes the cube on both sides of a turning layer.
+
+    Returns:
+        np.ndarray: A (114, 4, 3) array, the 4 corners of each facelet, then of the backing of each facelet,
+            then of the inner side of each layer of move_layers
+    """
+    vertices = []
+    for inset, size in ((.5, sticker_size), (.49, .5)):
+        for loc, face_idx in facelet_locs:
+            normal = face_normals[face_idx]
+            vertices.append(face_quad(np.array(loc) + normal * inset, int(np.flatnonzero(normal)[0]), size))
+    for axis, value in move_layers.values():
+        vertices.append(face_quad(np.eye(3)[axis] * value * .5, axis, 1.5))
+    # cube coordinates (x, y, z) are scene coordinates (x, z, y)
+    return np.array(vertices)[:, :, [0, 2, 1]]
+
+
+sticker_vertices = generate_sticker_vertices()
+# the facelets that move with each face turn
+layer_facelets = {face: [i for i, (loc, _) in enumerate(facelet_locs) if loc[axis] == value]
+                  for face, (axis, value) in move_layers.items()}
+facelet_colors = {ord("w"): color.white, ord("r"): color.red, ord("b"): color.blue,
+                  ord("o"): color.orange, ord("g"): color.green, ord("y"): color.yellow}
+backing_colors = [color.black] * (4 * (len(sticker_vertices) - 54))
+
+
+def sticker_triangles(facelets, layer: str = None) -> list[int]:
+    """Lists the triangles of some stickers and their backing
+
+    Args:
+        facelets: The facelets to draw
+        layer (str, optional): The face whose inner side is closed too, while it turns. Defaults to None.
+
+    Returns:
+        list[int]: The vertex indices of the triangles
+    """
+    quads = list(facelets) + [54 + i for i in facelets]
+    if layer is not None:
+        quads.append(108 + list(move_layers).index(layer))
+    return [4 * quad + corner for quad in quads for corner in (0, 1, 2, 0, 2, 3)]
+
+
+def sticker_colors(facelets: np.ndarray) -> list:
+    return [facelet_colors[c] for c in facelets.tolist() for _ in range(4)] + backing_colors
 
 
 class Simulation(Ursina):
     """Main class for the simulation"""
 
-    cube_colors = [
-        color.blue,  # right
-        color.green,  # left
-        color.white,  # top
-        color.yellow,  # bottom
-        color.orange,  # back
-        color.red,  # front
-    ]
-
-    faces = ("R", "L", "U", "D", "F", "B")
-    faces_to_normal = {
-        "R": Vec3(1, 0, 0),
-        "L": Vec3(-1, 0, 0),
-        "U": Vec3(0, 1, 0),
-        "D": Vec3(0, -1, 0),
-        "F": Vec3(0, 0, -1),
-        "B": Vec3(0, 0, 1),
+    # the rotation that turns each face clockwise, as the rotation_helper attribute and its sign
+    face_rotations = {
+        "R": ("rotation_x", 1),
+        "L": ("rotation_x", -1),
+        "U": ("rotation_y", 1),
+        "D": ("rotation_y", -1),
+        "F": ("rotation_z", 1),
+        "B": ("rotation_z", -1),
     }
-    stages = ["White Cross", "White Corners", "Middle Layer",
-              "Yellow Cross", "Yellow Edges", "Yellow Corner Position",
-              "Yellow Corner Orientation"]
+    stages = stage_names
 
     def __init__(self):
         super().__init__()
         self.internal_cube = RubiksCube()
+        # one cache per solver, so each button keeps returning its own kind of solution
+        self.kociemba_cache = SolutionCache()
+        self.beginners_cache = SolutionCache()
+        self.solution_caches = {"kociemba": self.kociemba_cache, "beginners": self.beginners_cache}
+        self.background_solver = BackgroundSolver()
+        self.solving_cube = None
+        self.solving_method = None
         self.controller = Entity(
             model='cube', scale=3, collider='box', visible=False)
-        self.reverse_dir = False
 
         self.controller.input = self.controller_input
+        self.controller.update = self.update_animation
+        # solutions longer than 30 seconds at speed 1 are played faster
+        self.move_queue = MoveQueue(turn_seconds=.25, max_seconds=30)
+        self.playback_keys = {
+            'space': self.toggle_pause,
+            'right arrow': self.move_queue.step,
+            'left arrow': lambda: self.move_queue.step(-1),
+            'up arrow': lambda: self.move_queue.set_speed(self.move_queue.speed * 2),
+            'down arrow': lambda: self.move_queue.set_speed(self.move_queue.speed / 2),
+            'backspace': self.move_queue.rewind,
+            'enter': self.move_queue.fast_forward,
+        }
         self.rotation_helper = Entity()
         self.win_text_entity = Text(
             y=.35, text='', color=color.green, origin=(0, 0), scale=3)
@@ -68,41 +143,69 @@ class Simulation(Ursina):
             text='reset', color=color.salmon, position=(.7, -.4), on_click=self.reset_cube)
         self.reset_button.fit_to_text()
 
-        self.markers = None
+        self.position_field = InputField(
+            default_value='', max_lines=1, character_limit=54, position=(.6, -.475))
+        self.load_position_button = Button(
+            text='load position', color=color.violet, position=(.7, -.55), on_click=self.load_position)
+        self.load_position_button.fit_to_text()
+
+        self.solving_text = Text(
+            y=.28, text='', color=color.azure, origin=(0, 0), scale=1.5)
+        self.cancel_solve_button = Button(
+            text='cancel solve', color=color.red, position=(.7, 0), on_click=self.cancel_solve, enabled=False)
+        self.cancel_solve_button.fit_to_text()
+
+        self.solve_result = None
         self.stage_idx = 0
 
         window.color = color._16
         EditorCamera(rotation=(20, -45, 0))
 
         # display instructions at the top left
-        Text(text='Controls:\nRight click + drag to rotate cube\n\nR, U, B, L, D, F for CW rotations\nShift + R, U, B, L, D, F for CCW rotations',
-                position=(-.7, .4), origin=(-.5, 0), scale=0.8)
+        Text(text='Controls:\nRight click + drag to rotate cube\n\nR, U, B, L, D, F for CW rotations\nShift + R, U, B, L, D, F for CCW rotations'
+                  '\n\nSpace to pause, left/right arrow to step\nUp/down arrow to change speed\nBackspace to rewind, enter to skip to the end',
+                position=(-.7, .35), origin=(-.5, 0), scale=0.8)
+        self.playback_text = Text(text='', position=(-.7, .15), origin=(-.5, 0), scale=0.8)
+
+    def run(self, *args, **kwargs):
+        try:
+            super().run(*args, **kwargs)
+        finally:
+            # a solve that is still running would otherwise keep the program from exiting until it finished
+            self.background_solver.shutdown()
 
     def generate_cube(self):
-        # make a model with a separate color on each face
-        self.combine_parent = Entity(enabled=False)
-        for i in range(3):
-            dir = Vec3(0, 0, 0)
-            dir[i] = 1
-
-            e = Entity(parent=self.combine_parent, model='plane', origin_y=-.5,
-                       texture='white_cube', color=self.cube_colors[i*2])
-            e.look_at(dir, 'up')
-
-            e_flipped = Entity(parent=self.combine_parent, model='plane',
-                               origin_y=-.5, texture='white_cube', color=self.cube_colors[(i*2)+1])
-            e_flipped.look_at(-dir, 'up')
-
-        self.combine_parent.combine()
-
-        # place 3x3x3 cubes
-        self.cubes = []
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    e = Entity(model=copy(self.combine_parent.model), position=Vec3(
-                        x, y, z) - (Vec3(3, 3, 3)/3), texture='white_cube')
-                    self.cubes.append(e)
+        # only the 54 stickers and their dark backing are drawn, as one mesh colored from the facelets of view_state
+        self.view_state = FaceletCube()
+        vertices = [Vec3(*vertex) for vertex in sticker_vertices.reshape(-1, 3).tolist()]
+        self.sticker_mesh = Mesh(vertices=vertices, triangles=sticker_triangles(range(54)),
+                                 colors=sticker_colors(self.view_state.facelets), mode='triangle', static=False)
+        self.stickers = Entity(model=self.sticker_mesh, double_sided=True)
+
+        # the stickers of the layer being turned are moved from the sticker mesh to this one while it turns
+        self.turning_mesh = Mesh(vertices=vertices, triangles=sticker_triangles(range(54)),
+                                 colors=sticker_colors(self.view_state.facelets), mode='triangle', static=False)
+        self.turning_stickers = Entity(parent=self.rotation_helper, model=self.turning_mesh, double_sided=True,
+                                       enabled=False)
+        self.turning_move = None
+
+    def update_stickers(self, turning: list[int] = ()):
+        """Recolors the sticker meshes from view_state
+
+        Args:
+            turning (list[int], optional): The facelets drawn by the turning mesh instead of the sticker mesh. Defaults to none.
+        """
+        colors = sticker_colors(self.view_state.facelets)
+        turning = set(turning)
+        layer = self.turning_move[0] if turning else None
+        self.sticker_mesh.triangles = sticker_triangles([i for i in range(54) if i not in turning], layer)
+        self.sticker_mesh.colors = colors
+        self.sticker_mesh.generate()
+        if turning:
+            self.turning_mesh.triangles = sticker_triangles(sorted(turning), layer)
+            self.turning_mesh.colors = colors
+            self.turning_mesh.generate()
+        self.turning_stickers.enabled = bool(turning)
 
     def controller_input(self, key):
         """Handles input from the controller
@@ -110,203 +213,200 @@ class Simulation(Ursina):
         Args:
             key (_type_): The key that was pressed
         """
-        if self.controller.ignore_input:
+        if self.position_field.active:
+            return
+        if key in self.playback_keys:
+            self.playback_keys[key]()
+            return
+        if key not in ('r', 'u', 'b', 'l', 'd', 'f'):
             return
-        if held_keys["shift"]:
-            self.reverse_dir = True
+
+        move = key.upper() + ("'" if held_keys["shift"] else "")
+        # a solve that is still running was for the cube before this move
+        self.cancel_solve()
+        self.internal_cube.move(move)
+        self.move_queue.extend([move])
+
+    def toggle_pause(self):
+        if self.move_queue.playing:
+            self.move_queue.pause()
         else:
-            self.reverse_dir = False
-
-        dir = -1 if self.reverse_dir else 1
-        modifier = "'" if self.reverse_dir else ""
-
-        if key == 'r':
-            self.rotate_side(Vec3(1, 0, 0), dir)
-            self.internal_cube.move("R" + modifier)
-        elif key == 'u':
-            self.rotate_side(Vec3(0, 1, 0), dir)
-            self.internal_cube.move("U" + modifier)
-        elif key == 'b':
-            self.rotate_side(Vec3(0, 0, 1), dir)
-            self.internal_cube.move("B" + modifier)
-        elif key == 'l':
-            self.rotate_side(Vec3(-1, 0, 0), dir)
-            self.internal_cube.move("L" + modifier)
-        elif key == 'd':
-            self.rotate_side(Vec3(0, -1, 0), dir)
-            self.internal_cube.move("D" + modifier)
-        elif key == 'f':
-            self.rotate_side(Vec3(0, 0, -1), dir)
-            self.internal_cube.move("F" + modifier)
-
-    def rotate_side(self, normal, direction=1, speed=1):
-        """Rotates a side of the cube
+            self.move_queue.play(self.move_queue.direction)
+
+    def update_animation(self):
+        """Advances the move queue by the frame time and draws the turn in progress, called every frame"""
+
+        future = self.background_solver.poll()
+        if future is not None:
+            self.finish_solve(future)
+
+        finished = self.move_queue.update(time.dt)
+        for move in finished:
+            self.view_state.move(move)
+        turning = self.move_queue.turning
+        move = turning[0] if turning else None
+        if finished or move != self.turning_move:
+            self.turning_move = move
+            self.update_stickers(layer_facelets[move[0]] if move else ())
 
-        Args:
-            normal (_type_): A vector representing the normal of the side to rotate
-            direction (int, optional): A direction of 1 is a clockwise move and -1 a counter-clockwise move. Defaults to 1.
-            speed (int, optional): The speed of the rotation. Defaults to 1.
-        """
-        if normal == Vec3(1, 0, 0):
-            [setattr(e, 'world_parent', self.rotation_helper)
-             for e in self.cubes if e.x > 0]
-            self.rotation_helper.animate(
-                'rotation_x', 90 * direction, duration=.2*speed, curve=curve.linear)
-        elif normal == Vec3(-1, 0, 0):
-            [setattr(e, 'world_parent', self.rotation_helper)
-             for e in self.cubes if e.x < 0]
-            self.rotation_helper.animate(
-                'rotation_x', -90 * direction, duration=.2*speed, curve=curve.linear)
-
-        elif normal == Vec3(0, 1, 0):
-            [setattr(e, 'world_parent', self.rotation_helper)
-             for e in self.cubes if e.y > 0]
-            self.rotation_helper.animate(
-                'rotation_y', 90 * direction, duration=.2*speed, curve=curve.linear)
-        elif normal == Vec3(0, -1, 0):
-            [setattr(e, 'world_parent', self.rotation_helper)
-             for e in self.cubes if e.y < 0]
-            self.rotation_helper.animate(
-                'rotation_y', -90 * direction, duration=.2*speed, curve=curve.linear)
-
-        elif normal == Vec3(0, 0, 1):
-            [setattr(e, 'world_parent', self.rotation_helper)
-             for e in self.cubes if e.z > 0]
-            self.rotation_helper.animate(
-                'rotation_z', -90 * direction, duration=.2*speed, curve=curve.linear)
-        elif normal == Vec3(0, 0, -1):
-            [setattr(e, 'world_parent', self.rotation_helper)
-             for e in self.cubes if e.z < 0]
-            self.rotation_helper.animate(
-                'rotation_z', 90 * direction, duration=.2*speed, curve=curve.linear)
-
-        invoke(self.reset_rotation_helper, delay=.3*speed)
-
-        if speed:
-            self.controller.ignore_input = True
-            invoke(setattr, self.controller,
-                   'ignore_input', False, delay=.24*speed)
-
-    def reset_rotation_helper(self):
-        [setattr(e, 'world_parent', scene) for e in self.cubes]
         self.rotation_helper.rotation = (0, 0, 0)
+        if move:
+            attribute, sign = self.face_rotations[move[0]]
+            setattr(self.rotation_helper, attribute, 90 * sign * turn_amount(move) * turning[1])
+
+        if self.solve_result is not None:
+            stage_idx = self.solve_result.stage_at(self.move_queue.move_index)
+            if stage_idx != self.stage_idx and stage_idx < len(self.stages):
+                self.stage_idx = stage_idx
+                self.win_text_entity.text = "Stage: " + self.stages[self.stage_idx]
+
+        status = f"speed {self.move_queue.speed:g}x" + ("" if self.move_queue.playing or self.move_queue.at_end else ", paused")
+        if self.playback_text.text != status:
+            self.playback_text.text = status
+
+        if finished and self.move_queue.at_end:
+            self.check_for_win()
 
     def check_for_win(self):
         """Checks if the cube is solved and displays a message if it is"""
 
         if self.internal_cube.check_solved():
             print("SOLVED")
-            self.controller.ignore_input = False
             self.win_text_entity.text = 'SOLVED!'
             self.win_text_entity.appear()
         else:
             self.win_text_entity.text = ''
 
-    def randomize_cube(self):
-        for _ in range(40):
-            face = random.choice(self.faces)
-            dir = random.choice((-1, 1))
-            self.rotate_side(
-                normal=self.faces_to_normal[face], direction=dir, speed=0)
-            self.internal_cube.move(face + ("'" if dir == -1 else ""))
+    def sync_view_from_state(self, state: RubiksCube | str = None):
+        """Shows a cube state straight away, without replaying any moves
 
-    def reset_cube(self):
-        for e in self.cubes:
-            destroy(e)
-        self.cubes.clear()
+        Args:
+            state (RubiksCube | str, optional): The cube to show, or its string notation (UDFBLR notation). It
+                replaces the internal cube (a copy of it), so the view and the model stay the same. Defaults to the
+                internal cube.
 
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    e = Entity(model=copy(self.combine_parent.model), position=Vec3(
-                        x, y, z) - (Vec3(3, 3, 3)/3), texture='white_cube')
-                    self.cubes.append(e)
+        Raises:
+            ValueError: If the string is not a solvable cube
+        """
+        if isinstance(state, str):
+            cube = RubiksCube.from_string_notation(state)
+            # the pieces only have to be a valid set, so a twisted corner or flipped edge is checked for here
+            cubie_state(cube.state.facelets)
+            self.internal_cube = cube
+        elif state is not None and state is not self.internal_cube:
+            self.internal_cube = state.copy()
+        facelets = self.internal_cube.state.facelets
+        # moves that are still queued belong to the old state, so they are dropped instead of finished
+        self.cancel_solve()
+        self.move_queue.clear()
+        self.solve_result = None
+        self.turning_move = None
+        self.rotation_helper.rotation = (0, 0, 0)
+        self.view_state = FaceletCube(facelets)
+        self.update_stickers()
 
-        for e in self.cubes:
-            e.rotation = (0, 0, 0)
+    def randomize_cube(self):
+        self.internal_cube.scramble(num_moves=40)
+        self.sync_view_from_state()
 
+    def reset_cube(self):
         self.internal_cube = RubiksCube()
+        self.sync_view_from_state()
         self.win_text_entity.text = ''
-        self.reset_rotation_helper()
 
-    def perform_move(self, move: str, move_speed: int, change_internal_cube: bool = True):
-        """Performs a move on the cube
+    def load_position(self, notation: str = None):
+        """Loads a cube in string notation (UDFBLR notation) into the simulation
 
         Args:
-            move (str): The move to perform
-            move_speed (int): The speed of the move
-            change_internal_cube (bool, optional): If the internal cube should be changed. Defaults to True.
+            notation (str, optional): The cube to load. Defaults to the text of the position field.
         """
-        if move[-1] == "'":
-            self.rotate_side(
-                self.faces_to_normal[move[:-1]], -1, speed=move_speed)
-        else:
-            self.rotate_side(self.faces_to_normal[move], 1, speed=move_speed)
-        if change_internal_cube:
-            self.internal_cube.move(move)
+        if notation is None:
+            notation = self.position_field.text.strip()
+        try:
+            self.sync_view_from_state(notation)
+        except ValueError:
+            self.win_text_entity.text = 'Invalid position'
+            return
+        self.win_text_entity.text = ''
 
-    def perform_moves(self, move_list: list[str], index: int, move_speed: int, change_internal_cube: bool = True):
-        """Performs a list of moves on the cube
+    def perform_moves(self, move_list: list[str]):
+        """Plays a list of moves on the view, replacing anything that is still queued
 
         Args:
-            move_list (list[str]): List of moves to perform
-            index (int): The index of the move to perform
-            move_speed (int): The speed of the move
-            change_internal_cube (bool, optional): If the internal cube should be changed. Defaults to True.
+            move_list (list[str]): List of moves to perform, quarter or half turns (the internal cube is not changed)
         """
-        if index >= len(move_list):
-            invoke(self.check_for_win, delay=.25*move_speed)
-            return
+        self.move_queue.load(move_list)
 
-        move = move_list[index]
-        self.perform_move(move, move_speed,
-                          change_internal_cube=change_internal_cube)
+    def solve_kociemba(self):
+        """Solves the cube using the kociemba library"""
 
-        if self.markers is not None:
-            for i in range(len(self.markers)):
-                if self.markers[i] == index:
-                    self.stage_idx += 1
-                    self.win_text_entity.text = "Stage: " + self.stages[self.stage_idx]
-                    break
+        self.start_solve("kociemba")
 
-        invoke(self.perform_moves, move_list, index+1, move_speed,
-               change_internal_cube=False, delay=.5*move_speed)
+    def solve_beginners(self):
+        """Solves the cube using the beginner's method"""
 
-    def solve_kociemba(self):
-        """Solves the cube using the kociemba library"""
+        self.start_solve("beginners")
 
-        self.controller.ignore_input = True
-        moves = kociemba.solve(
-            self.internal_cube.to_string_notation()).split(" ")
-        # break up moves with a 2 at the end into two moves
-        move_list = []
-        for move in moves:
-            if move[-1] == "2":
-                move_list.append(move[:-1])
-                move_list.append(move[:-1])
-            else:
-                move_list.append(move)
+    def start_solve(self, method: str):
+        """Plays a cached solution, or starts solving in the background and shows the solving indicator
 
-        for move in move_list:
-            self.internal_cube.move(move)
+        Args:
+            method (str): The solving method (beginners or kociemba)
+        """
+        # the solution starts from the internal cube, so moves still playing are finished at once
+        self.sync_view_from_state()
+        cached = self.solution_caches[method].get(self.internal_cube)
+        if cached is not None:
+            self.play_solution(method, SolveResult.from_markers(*cached) if method == "beginners" else cached[0])
+            return
 
-        self.perform_moves(move_list, 0, 0.6, change_internal_cube=False)
+        self.solving_cube = self.internal_cube.copy()
+        self.background_solver.submit(self.solving_cube, method)
+        self.solving_method = method
+        self.solving_text.text = 'solving\u2026'
+        self.cancel_solve_button.enabled = True
 
-    def solve_beginners(self):
-        """Solves the cube using the beginner's method"""
+    def cancel_solve(self):
+        if not self.background_solver.busy:
+            return
+        self.background_solver.cancel()
+        self.solving_text.text = ''
+        self.cancel_solve_button.enabled = False
+
+    def finish_solve(self, future):
+        """Stores and plays the solution of a finished background solve
+
+        Args:
+            future (Future): The finished future from the background solver
+        """
+        self.solving_text.text = ''
+        self.cancel_solve_button.enabled = False
+        try:
+            solution = future.result()
+        except Exception:
+            self.win_text_entity.text = 'Solve failed'
+            return
+
+        if self.solving_method == "beginners":
+            self.solution_caches["beginners"].put(self.solving_cube, solution.moves, solution.markers)
+        else:
+            self.solution_caches["kociemba"].put(self.solving_cube, solution)
+        self.play_solution(self.solving_method, solution)
+
+    def play_solution(self, method: str, solution: SolveResult | list[str]):
+        """Applies a solution to the internal cube and queues it on the view
+
+        Args:
+            method (str): The solving method (beginners or kociemba)
+            solution (SolveResult | list[str]): The stages of the solution for the beginner's method, the moves for kociemba
+        """
+        if method == "beginners":
+            self.solve_result = solution
+            self.stage_idx = 0
+            self.win_text_entity.text = "Stage: " + self.stages[self.stage_idx]
+            moves = solution.moves
+        else:
+            moves = solution
+        self.internal_cube.apply_algorithm(moves)
 
-        self.controller.ignore_input = True
-        self.win_text_entity.text = "Stage: " + self.stages[self.stage_idx]
-
-        moves, self.markers = solve_cube(self.internal_cube)
-        # break up moves with a 2 at the end into two moves
-        move_list = []
-        for move in moves:
-            if move[-1] == "2":
-                move_list.append(move[:-1])
-                move_list.append(move[:-1])
-                self.markers = [x + 1 for x in self.markers]
-            else:
-                move_list.append(move)
-
-        self.perform_moves(move_list, 0, 0.6, change_internal_cube=False)
\ No newline at end of file
+        self.perform_moves(moves)
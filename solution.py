@@ -0,0 +1,127 @@
+from bisect import bisect_right
+from algorithms import expand_half_turns
+
+stage_names = ["White Cross", "White Corners", "Middle Layer", "Yellow Cross", "Yellow Edges",
+               "Yellow Corner Position", "Yellow Corner Orientation"]
+
+
+class StageResult:
+    """This is a class that represents the part of a solution that solves one stage"""
+
+    def __init__(self, name: str, moves: list[str], seconds: float = 0.0, raw_move_count: int = None):
+        """Constructor for StageResult
+
+        Args:
+            name (str): The name of the stage
+            moves (list[str]): The moves that solve the stage
+            seconds (float, optional): The time it took to find (and optimize) the moves. Defaults to 0.0.
+            raw_move_count (int, optional): The number of moves before optimization. Defaults to the number of moves.
+        """
+        self.name = name
+        self.moves = list(moves)
+        self.seconds = seconds
+        self.raw_move_count = len(self.moves) if raw_move_count is None else raw_move_count
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def __repr__(self):
+        return f"StageResult({self.name!r}, {len(self.moves)} moves, {self.seconds * 1e3:.2f} ms)"
+
+
+class SolveResult:
+    """This is a class that represents a solution split into stages, so moves and time can be attributed to each stage"""
+
+    def __init__(self, stages: list[StageResult]):
+        """Constructor for SolveResult
+
+        Args:
+            stages (list[StageResult]): The stages, in the order they are solved
+        """
+        self.stages = stages
+
+    @classmethod
+    def from_markers(cls, moves: list[str], markers: list[int], names: list[str] = stage_names) -> "SolveResult":
+        """Splits a solution at its stage markers, for solutions that were stored as a move list and markers
+
+        Args:
+            moves (list[str]): The whole solution
+            markers (list[int]): The index where each stage ends
+            names (list[str], optional): The name of each stage. Defaults to the beginner's method stages.
+
+        Returns:
+            SolveResult: The solution (without timings)
+        """
+        starts = [0] + list(markers[:-1])
+        return cls([StageResult(name, moves[start:end]) for name, start, end in zip(names, starts, markers)])
+
+    @property
+    def moves(self) -> list[str]:
+        return [move_type for stage in self.stages for move_type in stage.moves]
+
+    @property
+    def markers(self) -> list[int]:
+        """The index where each stage ends, which is also the index of the first move of the next stage"""
+        markers = []
+        end = 0
+        for stage in self.stages:
+            end += len(stage)
+            markers.append(end)
+        return markers
+
+    @property
+    def slices(self) -> list[slice]:
+        starts = [0] + self.markers[:-1]
+        return [slice(start, end) for start, end in zip(starts, self.markers)]
+
+    @property
+    def seconds(self) -> float:
+        return sum(stage.seconds for stage in self.stages)
+
+    @property
+    def raw_move_count(self) -> int:
+        return sum(stage.raw_move_count for stage in self.stages)
+
+    def __len__(self) -> int:
+        return sum(len(stage) for stage in self.stages)
+
+    def __iter__(self):
+        # unpacks like the (moves, markers) tuple solve_cube used to return
+        return iter((self.moves, self.markers))
+
+    def __repr__(self):
+        return f"SolveResult({len(self)} moves, {len(self.stages)} stages, {self.seconds * 1e3:.2f} ms)"
+
+    def stage_at(self, index: int) -> int:
+        """Finds the stage a move belongs to
+
+        Args:
+            index (int): The index of the move in the whole solution
+
+        Returns:
+            int: The index of the stage (len(stages) for indices past the end)
+        """
+        return bisect_right(self.markers, index)
+
+    def expand_half_turns(self) -> "SolveResult":
+        """Writes every half turn as two quarter turns, stage by stage so the markers move with them
+
+        Returns:
+            SolveResult: The expanded solution, with the same timings
+        """
+        return SolveResult([StageResult(stage.name, expand_half_turns(stage.moves), stage.seconds, stage.raw_move_count)
+                            for stage in self.stages])
+
+    def to_dict(self) -> dict:
+        """Returns the solution as plain data, for JSON output
+
+        Returns:
+            dict: The moves, move count and time of the whole solution and of each stage
+        """
+        return {
+            "moves": " ".join(self.moves),
+            "move_count": len(self),
+            "seconds": self.seconds,
+            "stages": [{"name": stage.name, "moves": " ".join(stage.moves), "move_count": len(stage),
+                        "raw_move_count": stage.raw_move_count, "seconds": stage.seconds} for stage in self.stages]
+        }
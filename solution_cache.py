@@ -0,0 +1,129 @@
+import json
+import os
+from collections import OrderedDict
+from cube import RubiksCube
+from symmetry import canonicalize, transform_moves, inverse_symmetries
+
+cache_file_version = 2
+
+
+class SolutionCache:
+    """This is a class that stores solutions by canonical cube state, so a position that was already solved,
+    or any of its 48 symmetric/recolored equivalents, is answered without running a solver again
+
+    Solutions stored with stage markers are kept under the exact state instead, because the stages name faces
+    and colors (the white cross is built on top), which a symmetric equivalent would not match.
+    """
+
+    def __init__(self, max_size: int = 10000, path: str = None):
+        """Constructor for SolutionCache
+
+        Args:
+            max_size (int, optional): The number of solutions to keep, the least recently used ones are evicted. Defaults to 10000.
+            path (str, optional): A file to load the cache from and save it to. Defaults to None (not persisted).
+        """
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        # canonical state key -> (canonical solution, None), or exact state key -> (solution, stage markers)
+        self.entries = OrderedDict()
+
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, cube: RubiksCube) -> tuple[list[str], list[int]] | None:
+        """Looks up a solution for the cube
+
+        Args:
+            cube (RubiksCube): The cube to solve
+
+        Returns:
+            tuple[list[str], list[int]] | None: The solution for this cube and the stage markers stored with it, or None if there is no entry
+        """
+        key = cube.state_key()
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] is not None:
+            moves, markers = entry
+            s = None
+        else:
+            key, s = canonicalize(cube.state.facelets)
+            entry = self.entries.get(key)
+            # the markers of an entry only hold for the exact cube it was stored for
+            if entry is None or entry[1] is not None:
+                self.misses += 1
+                return None
+            moves, markers = entry
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return (moves if s is None else transform_moves(moves, inverse_symmetries[s])), markers
+
+    def put(self, cube: RubiksCube, moves: list[str], markers: list[int] = None):
+        """Stores a solution for the cube
+
+        Args:
+            cube (RubiksCube): The cube the solution was found for (in its unsolved state)
+            moves (list[str]): The moves that solve the cube
+            markers (list[int], optional): Stage markers to return with the solution, the solution is then only
+                returned for this exact cube and not its symmetric equivalents. Defaults to None.
+        """
+        if markers is None:
+            key, s = canonicalize(cube.state.facelets)
+            self.entries[key] = (transform_moves(moves, s), None)
+        else:
+            key = cube.state_key()
+            self.entries[key] = (list(moves), list(markers))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry and resets the hit and miss counters"""
+
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, path: str = None):
+        """Writes the cache to disk, replacing the file atomically
+
+        Args:
+            path (str, optional): The file to write. Defaults to the path given to the constructor.
+
+        Raises:
+            ValueError: If no path is given
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path to save the solution cache to")
+
+        data = {
+            "version": cache_file_version,
+            # keys are the facelet colors, which are plain ASCII letters
+            "entries": [[key.decode(), " ".join(moves), markers] for key, (moves, markers) in self.entries.items()]
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str = None):
+        """Loads entries from disk, a file written by a different version is ignored
+
+        Args:
+            path (str, optional): The file to read. Defaults to the path given to the constructor.
+        """
+        path = path or self.path
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != cache_file_version:
+            return
+
+        for key, moves, markers in data["entries"]:
+            self.entries[key.encode()] = (moves.split(), markers)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
@@ -1,46 +1,52 @@
+import json
+import os
+import time
+from functools import lru_cache
+from algorithms import simplify_algorithm
 from cube import RubiksCube, Piece
 from data import str_sort
+from peephole import peephole_optimize
+from solution import SolveResult, StageResult, stage_names
 
 c = RubiksCube()
 correct_pos_map = {str_sort(p.orientation): p.pos for p in c.pieces}
 correct_orientation_map = {
     str_sort(p.orientation): p.orientation for p in c.pieces}
 
+# the moves for every case of every stage, see generate_case_tables.py
+case_tables_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "case_tables.json")
+case_tables_version = 1
 
-def solve_cube(internal_cube: RubiksCube) -> tuple[list[str], list[int]]:
+# the pieces the last layer stages look at, edges and corners in clockwise order
+last_layer_edge_locs = [(0, 1, -1), (-1, 0, -1), (0, -1, -1), (1, 0, -1)]
+last_layer_corner_locs = [(1, 1, -1), (-1, 1, -1), (-1, -1, -1), (1, -1, -1)]
+
+
+def solve_cube(internal_cube: RubiksCube, in_place: bool = True, half_turns: bool = False) -> SolveResult:
     """Solves the given cube
 
     Args:
         internal_cube (RubiksCube): Cube to solve
+        in_place (bool, optional): If the given cube should be solved. If False, a copy is solved and the given cube is left untouched. Defaults to True.
+        half_turns (bool, optional): If True, the algorithm uses half turns (X2) instead of pairs of quarter turns. Defaults to False.
 
     Returns:
-        tuple[list[str], list[int]]: A tuple containing the algorithm to solve the cube and a list of markers that indicate what stage of the algorithm we are on
+        SolveResult: The algorithm to solve the cube, split into stages with the moves and time of each. It unpacks
+            into the algorithm and a list of markers that indicate where each stage ends.
     """
-    white_cross_algorithm = solve_white_cross(internal_cube)
-    first_layer_algorithm = solve_first_layer(internal_cube)
-    second_layer_algorithm = solve_second_layer(internal_cube)
-    yellow_cross_algorithm = solve_yellow_cross(internal_cube)
-    yellow_edges_algorithm = solve_yellow_edges(internal_cube)
-    yellow_corner_position_algorithm = solve_yellow_corner_position(
-        internal_cube)
-    yellow_corner_orientation_algorithm = solve_yellow_corner_orientation(
-        internal_cube)
-
-    raw_algorithm = white_cross_algorithm + first_layer_algorithm + second_layer_algorithm + yellow_cross_algorithm + \
-        yellow_edges_algorithm + yellow_corner_position_algorithm + \
-        yellow_corner_orientation_algorithm
-    
-    # Keeps track of what stage of the algorithm we are on
-    markers = [
-        len(white_cross_algorithm),
-        len(white_cross_algorithm) + len(first_layer_algorithm),
-        len(white_cross_algorithm) + len(first_layer_algorithm) + len(second_layer_algorithm),
-        len(white_cross_algorithm) + len(first_layer_algorithm) + len(second_layer_algorithm) + len(yellow_cross_algorithm),
-        len(white_cross_algorithm) + len(first_layer_algorithm) + len(second_layer_algorithm) + len(yellow_cross_algorithm) + len(yellow_edges_algorithm),
-        len(white_cross_algorithm) + len(first_layer_algorithm) + len(second_layer_algorithm) + len(yellow_cross_algorithm) + len(yellow_edges_algorithm) + len(yellow_corner_position_algorithm),
-        len(white_cross_algorithm) + len(first_layer_algorithm) + len(second_layer_algorithm) + len(yellow_cross_algorithm) + len(yellow_edges_algorithm) + len(yellow_corner_position_algorithm) + len(yellow_corner_orientation_algorithm)
-    ]
-    return optimize_algorithm(raw_algorithm), markers
+    if not in_place:
+        internal_cube = internal_cube.copy()
+
+    stage_solvers = [solve_white_cross, solve_first_layer, solve_second_layer, solve_yellow_cross,
+                     solve_yellow_edges, solve_yellow_corner_position, solve_yellow_corner_orientation]
+    stages = []
+    for name, stage_solver in zip(stage_names, stage_solvers):
+        start = time.perf_counter()
+        raw_algorithm = stage_solver(internal_cube)
+        # each stage is optimized on its own, so the cube is in the same state at the end of every stage
+        algorithm = optimize_stage(raw_algorithm, half_turns)
+        stages.append(StageResult(name, algorithm, time.perf_counter() - start, len(raw_algorithm)))
+    return SolveResult(stages)
 
 
 def solve_white_cross(internal_cube: RubiksCube) -> list[str]:
@@ -54,58 +60,10 @@ def solve_white_cross(internal_cube: RubiksCube) -> list[str]:
         if len(unsolved_white_edges) == 0:
             break
 
+        # the moves for the next edge only depend on where that edge is and which way it faces
         piece = unsolved_white_edges[0]
-        if piece.pos[2] == -1:
-            piece = unsolved_white_edges[0]
-            # twist the bottom layer until the white piece is directly below where it needs to go on the top layer
-            other_color = [
-                color for color in piece.orientation if color != "w" and color != "0"][0]
-            while other_color not in internal_cube.get_piece((piece.pos[0], piece.pos[1], 0)).orientation:
-                perform_internal_move(internal_cube, move_list, "D")
-
-            # move it to the top layer
-            front_center_piece = internal_cube.get_piece(
-                (piece.pos[0], piece.pos[1], 0))
-            front_face_color = [
-                color for color in front_center_piece.orientation if color != "0"][0]
-
-            # if white is on the bottom of the piece
-            if piece.orientation[5] == "w":
-                converted_algorithm = convert_algorithm(
-                    "F F", front_face_color, "w")
-            else:
-                converted_algorithm = convert_algorithm(
-                    "D R F' R'", front_face_color, "w")
-            move_list.extend(converted_algorithm)
-            for move in converted_algorithm:
-                internal_cube.move(move)
-        elif piece.pos[2] == 0:
-            # move it to the bottom layer
-            if piece.pos[0] == 1 and piece.pos[1] == 1:
-                algorithm = "B' D' B"
-            elif piece.pos[0] == 1 and piece.pos[1] == -1:
-                algorithm = "R' D' R"
-            elif piece.pos[0] == -1 and piece.pos[1] == -1:
-                algorithm = "L D L'"
-            else:
-                algorithm = "B D B'"
-
-            perform_internal_moves(
-                internal_cube, move_list, algorithm.split(" "))
-
-        elif piece.pos[2] == 1:
-            # move it to the bottom layer
-            if piece.pos[0] == 1 and piece.pos[1] == 0:
-                algorithm = "R R"
-            elif piece.pos[0] == 0 and piece.pos[1] == -1:
-                algorithm = "F F"
-            elif piece.pos[0] == -1 and piece.pos[1] == 0:
-                algorithm = "L L"
-            else:
-                algorithm = "B B"
-
-            perform_internal_moves(
-                internal_cube, move_list, algorithm.split(" "))
+        perform_internal_moves(internal_cube, move_list,
+                               lookup_case("white_cross", piece_case(piece)))
 
     # assert that the white cross is solved
     if not all([piece.pos == correct_pos_map[str_sort(piece.orientation)] and piece.orientation == correct_orientation_map[str_sort(piece.orientation)] for piece in internal_cube.pieces if "w" in piece.orientation and piece.type == "e"]):
@@ -124,89 +82,10 @@ def solve_first_layer(internal_cube: RubiksCube) -> list[str]:
             key=lambda piece: str_sort(piece.orientation))
         if len(unsolved_white_corners) == 0:
             break
+
         piece = unsolved_white_corners[0]
-        if piece.pos[2] == -1:
-            if piece.orientation[5] != "w":
-                # twist the bottom layer until the white piece is directly below where it needs to go on the top layer
-                correct_pos = correct_pos_map[str_sort(piece.orientation)]
-                while piece.pos[0] != correct_pos[0] or piece.pos[1] != correct_pos[1]:
-                    perform_internal_move(internal_cube, move_list, "D")
-
-                first_center_piece = internal_cube.get_piece(
-                    (piece.pos[0], 0, 0))
-                second_center_piece = internal_cube.get_piece(
-                    (0, piece.pos[1], 0))
-
-                first_outward_dir = [i for i in range(
-                    6) if first_center_piece.orientation[i] != "0"][0]
-                second_outward_dir = [i for i in range(
-                    6) if second_center_piece.orientation[i] != "0"][0]
-                first_color = first_center_piece.orientation[first_outward_dir]
-                second_color = second_center_piece.orientation[second_outward_dir]
-                if piece.orientation[first_outward_dir] == first_color:
-                    if is_right_of(first_center_piece, second_center_piece):
-                        converted_algorithm = convert_algorithm(
-                            "L D L'", first_color, "w")
-                    else:
-                        converted_algorithm = convert_algorithm(
-                            "R' D' R", first_color, "w")
-                else:
-                    if is_right_of(first_center_piece, second_center_piece):
-                        converted_algorithm = convert_algorithm(
-                            "R' D' R", second_color, "w")
-                    else:
-                        converted_algorithm = convert_algorithm(
-                            "L D L'", second_color, "w")
-
-                perform_internal_moves(
-                    internal_cube, move_list, converted_algorithm)
-            else:
-                # twist the bottom layer until the white piece is directly below where it needs to go on the top layer
-                correct_pos = correct_pos_map[str_sort(piece.orientation)]
-                while piece.pos[0] != correct_pos[0] or piece.pos[1] != correct_pos[1]:
-                    perform_internal_move(internal_cube, move_list, "D")
-
-                first_center_piece = internal_cube.get_piece(
-                    (piece.pos[0], 0, 0))
-                second_center_piece = internal_cube.get_piece(
-                    (0, piece.pos[1], 0))
-
-                first_outward_dir = [i for i in range(
-                    6) if first_center_piece.orientation[i] != "0"][0]
-                second_outward_dir = [i for i in range(
-                    6) if second_center_piece.orientation[i] != "0"][0]
-                first_color = first_center_piece.orientation[first_outward_dir]
-                second_color = second_center_piece.orientation[second_outward_dir]
-
-                if is_right_of(first_center_piece, second_center_piece):
-                    converted_algorithm = convert_algorithm(
-                        "R' D R", second_color, "w")
-                else:
-                    converted_algorithm = convert_algorithm(
-                        "R' D R", first_color, "w")
-
-                perform_internal_moves(
-                    internal_cube, move_list, converted_algorithm)
-        else:
-            first_center_piece = internal_cube.get_piece((piece.pos[0], 0, 0))
-            second_center_piece = internal_cube.get_piece((0, piece.pos[1], 0))
-
-            first_outward_dir = [i for i in range(
-                6) if first_center_piece.orientation[i] != "0"][0]
-            second_outward_dir = [i for i in range(
-                6) if second_center_piece.orientation[i] != "0"][0]
-            first_color = first_center_piece.orientation[first_outward_dir]
-            second_color = second_center_piece.orientation[second_outward_dir]
-
-            if is_right_of(first_center_piece, second_center_piece):
-                converted_algorithm = convert_algorithm(
-                    "R' D R", second_color, "w")
-            else:
-                converted_algorithm = convert_algorithm(
-                    "R' D R", first_color, "w")
-
-            perform_internal_moves(
-                internal_cube, move_list, converted_algorithm)
+        perform_internal_moves(internal_cube, move_list,
+                               lookup_case("first_layer", piece_case(piece)))
 
     # assert that the first layer is solved
     if not all([piece.pos == correct_pos_map[str_sort(piece.orientation)] and piece.orientation == correct_orientation_map[str_sort(piece.orientation)] for piece in internal_cube.pieces if "w" in piece.orientation]):
@@ -224,66 +103,10 @@ def solve_second_layer(internal_cube: RubiksCube) -> list[str]:
         target_edges.sort(key=lambda piece: str_sort(piece.orientation))
         if len(target_edges) == 0:
             break
-        piece = target_edges[0]
 
-        if piece.pos[2] == -1:
-            # get the color that is not facing down
-            other_color = [color for i, color in enumerate(
-                piece.orientation) if color != "0" and i != 5][0]
-            # twist the bottom layer until the center piece with the other color is directly below the edge piece
-            while other_color not in internal_cube.get_piece((piece.pos[0], piece.pos[1], 0)).orientation:
-                perform_internal_move(internal_cube, move_list, "D")
-
-            # get the current center piece
-            current_center_piece = internal_cube.get_piece(
-                (piece.pos[0], piece.pos[1], 0))
-            current_color = [
-                color for color in current_center_piece.orientation if color != "0"][0]
-
-            # get the center piece on both the faces left and right of the current face
-            first_center_piece = internal_cube.get_piece(
-                (*rotate_ccw(piece.pos[:2]), 0))
-            second_center_piece = internal_cube.get_piece(
-                (*rotate_cw(piece.pos[:2]), 0))
-            first_color = [
-                color for color in first_center_piece.orientation if color != "0"][0]
-            second_color = [
-                color for color in second_center_piece.orientation if color != "0"][0]
-
-            converted_algorithm = None
-            if piece.orientation[5] == first_color:
-                if is_right_of(first_center_piece, current_center_piece):
-                    converted_algorithm = convert_algorithm(
-                        "U' L' U L U F U' F'", current_color, "y")
-                else:
-                    converted_algorithm = convert_algorithm(
-                        "U R U' R' U' F' U F", current_color, "y")
-            elif piece.orientation[5] == second_color:
-                if is_right_of(second_center_piece, current_center_piece):
-                    converted_algorithm = convert_algorithm(
-                        "U' L' U L U F U' F'", current_color, "y")
-                else:
-                    converted_algorithm = convert_algorithm(
-                        "U R U' R' U' F' U F", current_color, "y")
-
-            perform_internal_moves(
-                internal_cube, move_list, converted_algorithm)
-        else:
-            first_center_piece = internal_cube.get_piece((piece.pos[0], 0, 0))
-            second_center_piece = internal_cube.get_piece((0, piece.pos[1], 0))
-            first_color = [
-                color for color in first_center_piece.orientation if color != "0"][0]
-            second_color = [
-                color for color in second_center_piece.orientation if color != "0"][0]
-            if is_right_of(first_center_piece, second_center_piece):
-                converted_algorithm = convert_algorithm(
-                    "U R U' R' U' F' U F", first_color, "y")
-            else:
-                converted_algorithm = convert_algorithm(
-                    "U' L' U L U F U' F'", first_color, "y")
-
-            perform_internal_moves(
-                internal_cube, move_list, converted_algorithm)
+        piece = target_edges[0]
+        perform_internal_moves(internal_cube, move_list,
+                               lookup_case("second_layer", piece_case(piece)))
 
     # assert that the second layer is solved
     if not all([piece.pos == correct_pos_map[str_sort(piece.orientation)] and piece.orientation == correct_orientation_map[str_sort(piece.orientation)] for piece in internal_cube.pieces if "y" not in piece.orientation]):
@@ -294,40 +117,8 @@ def solve_second_layer(internal_cube: RubiksCube) -> list[str]:
 
 def solve_yellow_cross(internal_cube: RubiksCube) -> list[str]:
     move_list = []
-    algorithm = None
-
-    # get all yellow edges
-    top_edge = internal_cube.get_piece((0, 1, -1))
-    right_edge = internal_cube.get_piece((-1, 0, -1))
-    bottom_edge = internal_cube.get_piece((0, -1, -1))
-    left_edge = internal_cube.get_piece((1, 0, -1))
-    # get number of yellow edges facing down
-    num_facing_down = sum([1 for edge in [
-                          top_edge, right_edge, bottom_edge, left_edge] if edge.orientation[5] == "y"])
-
-    # yellow dot on top
-    if num_facing_down == 0:
-        algorithm = "F R U R' U' R U R' U' F' U' F R U R' U' F'"
-    # yellow line or L on top
-    elif num_facing_down == 2:
-        # line cases
-        if top_edge.orientation[5] == "y" and bottom_edge.orientation[5] == "y":
-            algorithm = "U F R U R' U' F'"
-        elif left_edge.orientation[5] == "y" and right_edge.orientation[5] == "y":
-            algorithm = "F R U R' U' F'"
-        # L cases
-        elif top_edge.orientation[5] == "y" and left_edge.orientation[5] == "y":
-            algorithm = "F R U R' U' R U R' U' F'"
-        elif top_edge.orientation[5] == "y" and right_edge.orientation[5] == "y":
-            algorithm = "U' F R U R' U' R U R' U' F'"
-        elif bottom_edge.orientation[5] == "y" and right_edge.orientation[5] == "y":
-            algorithm = "U U F R U R' U' F' F R U R' U' F'"
-        elif bottom_edge.orientation[5] == "y" and left_edge.orientation[5] == "y":
-            algorithm = "U F R U R' U' R U R' U' F'"
-
-    if algorithm:
-        converted_algorithm = convert_algorithm(algorithm, "r", "y")
-        perform_internal_moves(internal_cube, move_list, converted_algorithm)
+    perform_internal_moves(internal_cube, move_list, lookup_case(
+        "yellow_cross", last_layer_case(internal_cube, "yellow_cross")))
 
     # assert that the yellow cross is solved
     f2l = [piece for piece in internal_cube.pieces if piece.pos[2] != -1]
@@ -341,84 +132,8 @@ def solve_yellow_cross(internal_cube: RubiksCube) -> list[str]:
 
 def solve_yellow_edges(internal_cube: RubiksCube) -> list[str]:
     move_list = []
-
-    for _ in range(4):
-        perform_internal_move(internal_cube, move_list, "D")
-
-        # get all yellow edges
-        top_edge = internal_cube.get_piece((0, 1, -1))
-        right_edge = internal_cube.get_piece((-1, 0, -1))
-        bottom_edge = internal_cube.get_piece((0, -1, -1))
-        left_edge = internal_cube.get_piece((1, 0, -1))
-
-        is_correct = {"top": False, "right": False,
-                      "bottom": False, "left": False}
-        if correct_pos_map[str_sort(top_edge.orientation)] == top_edge.pos:
-            is_correct["top"] = True
-        if correct_pos_map[str_sort(right_edge.orientation)] == right_edge.pos:
-            is_correct["right"] = True
-        if correct_pos_map[str_sort(bottom_edge.orientation)] == bottom_edge.pos:
-            is_correct["bottom"] = True
-        if correct_pos_map[str_sort(left_edge.orientation)] == left_edge.pos:
-            is_correct["left"] = True
-
-        num_correct = sum([1 for correct in is_correct if is_correct[correct]])
-        # if number of correct is 4, then we are done
-        if num_correct == 4:
-            return move_list
-        # if number of correct is 2, then we must position the cube so that those are on the top and right
-        elif num_correct == 2:
-            if is_correct["top"] and is_correct["right"]:
-                # do nothing
-                pass
-            elif is_correct["right"] and is_correct["bottom"]:
-                perform_internal_move(internal_cube, move_list, "D'")
-            elif is_correct["bottom"] and is_correct["left"]:
-                perform_internal_move(internal_cube, move_list, "D")
-                perform_internal_move(internal_cube, move_list, "D")
-            elif is_correct["left"] and is_correct["top"]:
-                perform_internal_move(internal_cube, move_list, "D")
-            else:
-                if is_correct["top"] and is_correct["bottom"]:
-                    algorithm = "R U R' U R U U R' U'"
-                    converted_algorithm = convert_algorithm(
-                        algorithm, "r", "y")
-                    perform_internal_moves(
-                        internal_cube, move_list, converted_algorithm)
-                elif is_correct["right"] and is_correct["left"]:
-                    algorithm = "R U R' U R U U R' U'"
-                    converted_algorithm = convert_algorithm(
-                        algorithm, "r", "y")
-                    perform_internal_moves(
-                        internal_cube, move_list, converted_algorithm)
-            # perform algorithm
-            algorithm = "R U R' U R U U R'"
-            converted_algorithm = convert_algorithm(algorithm, "r", "y")
-            perform_internal_moves(
-                internal_cube, move_list, converted_algorithm)
-
-            # get all yellow edges
-            top_edge = internal_cube.get_piece((0, 1, -1))
-            right_edge = internal_cube.get_piece((-1, 0, -1))
-            bottom_edge = internal_cube.get_piece((0, -1, -1))
-            left_edge = internal_cube.get_piece((1, 0, -1))
-
-            # twist the bottom layer until they are all correct (if one is correct, then they all are)
-            num_loops = 0
-            continue_flag = False
-            while not (correct_pos_map[str_sort(top_edge.orientation)] == top_edge.pos and correct_pos_map[str_sort(right_edge.orientation)] == right_edge.pos and correct_pos_map[str_sort(bottom_edge.orientation)] == bottom_edge.pos and correct_pos_map[str_sort(left_edge.orientation)] == left_edge.pos):
-                if num_loops > 4:
-                    continue_flag = True
-                    break
-
-                perform_internal_move(internal_cube, move_list, "D")
-                num_loops += 1
-            if continue_flag:
-                continue
-            break
-        else:
-            # raise Exception("Invalid cube state")
-            pass
+    perform_internal_moves(internal_cube, move_list, lookup_case(
+        "yellow_edges", last_layer_case(internal_cube, "yellow_edges")))
 
     f2l = [piece for piece in internal_cube.pieces if piece.pos[2] != -1]
     bottom_layer_edges = [
@@ -432,44 +147,8 @@ def solve_yellow_edges(internal_cube: RubiksCube) -> list[str]:
 
 def solve_yellow_corner_position(internal_cube: RubiksCube) -> list[str]:
     move_list = []
-
-    # get all yellow corners, order is top left (r as front and y as top) and goes clockwise
-    corners = [internal_cube.get_piece((1, 1, -1)), internal_cube.get_piece(
-        (-1, 1, -1)), internal_cube.get_piece((-1, -1, -1)), internal_cube.get_piece((1, -1, -1))]
-    # get number of yellow corners in correct position
-    is_correct = [corner.pos == correct_pos_map[str_sort(
-        corner.orientation)] for corner in corners]
-    num_correct = sum([1 for correct in is_correct if correct])
-    if num_correct == 4:
-        return move_list
-    elif num_correct == 0 or num_correct == 1:
-        # while number of correct is not 4
-        num_loops = 0
-        while num_correct != 4:
-            if num_loops > 8:
-                raise Exception("Invalid cube state")
-
-            algorithm = "U R U' L' U R' U' L"
-            if is_correct[0]:
-                converted_algorithm = convert_algorithm(algorithm, "o", "y")
-            elif is_correct[1]:
-                converted_algorithm = convert_algorithm(algorithm, "g", "y")
-            elif is_correct[2]:
-                converted_algorithm = convert_algorithm(algorithm, "r", "y")
-            else:
-                converted_algorithm = convert_algorithm(algorithm, "b", "y")
-            perform_internal_moves(
-                internal_cube, move_list, converted_algorithm)
-
-            corners = [internal_cube.get_piece((1, 1, -1)), internal_cube.get_piece(
-                (-1, 1, -1)), internal_cube.get_piece((-1, -1, -1)), internal_cube.get_piece((1, -1, -1))]
-            is_correct = [corner.pos == correct_pos_map[str_sort(
-                corner.orientation)] for corner in corners]
-            num_correct = sum([1 for correct in is_correct if correct])
-
-            num_loops += 1
-    else:
-        raise Exception("Invalid cube state")
+    perform_internal_moves(internal_cube, move_list, lookup_case(
+        "yellow_corner_position", last_layer_case(internal_cube, "yellow_corner_position")))
 
     # assert that the yellow corners are in the correct position
     if not all([piece.pos == correct_pos_map[str_sort(piece.orientation)] for piece in internal_cube.pieces if piece.type == "c" and "y" in piece.orientation]):
@@ -480,31 +159,8 @@ def solve_yellow_corner_position(internal_cube: RubiksCube) -> list[str]:
 
 def solve_yellow_corner_orientation(internal_cube: RubiksCube) -> list[str]:
     move_list = []
-    outer_num_loops = 0
-    while not all([piece.orientation[5] == "y" for piece in internal_cube.pieces if piece.type == "c" and "y" in piece.orientation]):
-        if outer_num_loops > 4:
-            raise Exception("Invalid cube state")
-        anchor_piece = internal_cube.get_piece((-1, -1, -1))
-        # if the anchor piece is not in the right orientation, then we need to correct it
-        inner_num_loops = 0
-        while anchor_piece.orientation[5] != "y":
-            if inner_num_loops > 6:
-                raise Exception("Invalid cube state")
-            algorithm = "R' D' R D"
-            converted_algorithm = convert_algorithm(algorithm, "r", "y")
-            perform_internal_moves(
-                internal_cube, move_list, converted_algorithm)
-            inner_num_loops += 1
-        internal_cube.move("D'")
-        move_list.append("D'")
-        outer_num_loops += 1
-
-    num_loops = 0
-    while not is_solved(internal_cube):
-        if num_loops > 4:
-            raise Exception("Invalid cube state")
-        perform_internal_move(internal_cube, move_list, "D'")
-        num_loops += 1
+    perform_internal_moves(internal_cube, move_list, lookup_case(
+        "yellow_corner_orientation", last_layer_case(internal_cube, "yellow_corner_orientation")))
 
     if not is_solved(internal_cube):
         raise Exception("Cube not solved after yellow corner orientation")
@@ -512,61 +168,118 @@ def solve_yellow_corner_orientation(internal_cube: RubiksCube) -> list[str]:
     return move_list
 
 
+def piece_case(piece: Piece) -> str:
+    """Gets the case of a first or second layer step, which is the position and orientation of the piece being solved
+
+    Args:
+        piece (Piece): The piece being solved
+
+    Returns:
+        str: The key of the case in the case tables
+    """
+    return f"{piece.pos[0]} {piece.pos[1]} {piece.pos[2]} {piece.orientation}"
+
+
+def last_layer_case(internal_cube: RubiksCube, stage: str) -> str:
+    """Gets the case of a last layer stage, made from only the pieces that stage looks at
+
+    Args:
+        internal_cube (RubiksCube): Cube with the first two layers solved
+        stage (str): The stage (yellow_cross, yellow_edges, yellow_corner_position or yellow_corner_orientation)
+
+    Raises:
+        Exception: If the stage is invalid
+
+    Returns:
+        str: The key of the case in the case tables
+    """
+    edges = [internal_cube.get_piece(loc) for loc in last_layer_edge_locs]
+    corners = [internal_cube.get_piece(loc) for loc in last_layer_corner_locs]
+    if stage == "yellow_cross":
+        # which edges have yellow facing down
+        return "".join(["1" if edge.orientation[5] == "y" else "0" for edge in edges])
+    elif stage == "yellow_edges":
+        return " ".join([edge.orientation for edge in edges])
+    elif stage == "yellow_corner_position":
+        # which corner is where, ignoring how it is twisted
+        return " ".join([str_sort(corner.orientation) for corner in corners])
+    elif stage == "yellow_corner_orientation":
+        return " ".join([corner.orientation for corner in corners])
+    else:
+        raise Exception("Invalid stage")
+
+
+@lru_cache(maxsize=None)
+def load_case_tables() -> dict[str, dict[str, list[str]]]:
+    """Loads the case tables shipped with the solver (generated by generate_case_tables.py), on first use
+
+    Raises:
+        Exception: If the tables were generated for a different version
+
+    Returns:
+        dict[str, dict[str, list[str]]]: For each stage, the moves to perform for each case
+    """
+    with open(case_tables_path) as f:
+        data = json.load(f)
+    if data["version"] != case_tables_version:
+        raise Exception("Case tables are out of date, run generate_case_tables.py")
+    return {stage: {case: algorithm.split() for case, algorithm in cases.items()}
+            for stage, cases in data["stages"].items()}
+
+
+def lookup_case(stage: str, case: str) -> list[str]:
+    """Looks up the moves that solve a case of a stage
+
+    Args:
+        stage (str): The stage being solved
+        case (str): The case, from piece_case or last_layer_case
+
+    Raises:
+        Exception: If the case cannot happen on a valid cube
+
+    Returns:
+        list[str]: The moves to perform
+    """
+    cases = load_case_tables()[stage]
+    if case not in cases:
+        raise Exception("Invalid cube state")
+    return cases[case]
+
+
 def perform_internal_move(internal_cube: RubiksCube, move_list: list[str], move: str):
     internal_cube.move(move)
     move_list.append(move)
 
 
 def perform_internal_moves(internal_cube: RubiksCube, move_list: list[str], moves: list[str]):
-    for move in moves:
-        internal_cube.move(move)
+    internal_cube.apply_algorithm(moves)
     move_list.extend(moves)
 
 
-def optimize_algorithm(algorithm: list[str]) -> list[str]:
-    # three subsequent moves in the same direction can be replaced with a single move in the opposite direction
-    first_iteration = []
-    i = 0
-    while i < len(algorithm):
-        if i < len(algorithm) - 2 and algorithm[i] == algorithm[i + 1] == algorithm[i + 2]:
-            if "'" in algorithm[i]:
-                first_iteration.append(algorithm[i][:-1])
-            else:
-                first_iteration.append(algorithm[i] + "'")
-            i += 3
-        else:
-            first_iteration.append(algorithm[i])
-            i += 1
-
-    # a move followed by its inverse can be removed
-    second_iteration = []
-    i = 0
-    while i < len(first_iteration):
-        if i < len(first_iteration) - 1 and first_iteration[i] == inverse(first_iteration[i + 1]):
-            i += 2
-        else:
-            second_iteration.append(first_iteration[i])
-            i += 1
-
-    print("Reduced algorithm from", len(algorithm),
-          "moves to", len(second_iteration), "moves")
-
-    return second_iteration
-
-
-def inverse(move: str) -> str:
-    """Returns the inverse of the given move
+def optimize_algorithm(algorithm: list[str], half_turns: bool = False) -> list[str]:
+    """Removes redundant moves from an algorithm, see optimize_stage
 
     Args:
-        move (str): The move to invert
+        algorithm (list[str]): The algorithm to optimize
+        half_turns (bool, optional): If True, two quarter turns are written as a half turn (X2). Defaults to False.
 
     Returns:
-        str: The inverse of the given move
+        list[str]: The optimized algorithm
     """
-    if "'" in move:
-        return move[:-1]
-    else:
-        return move + "'"
+    return optimize_stage(algorithm, half_turns)
+
+
+def optimize_stage(algorithm: list[str], half_turns: bool = False) -> list[str]:
+    """Cancels redundant moves and replaces windows that have a shorter equivalent
+
+    Args:
+        algorithm (list[str]): The algorithm to optimize
+        half_turns (bool, optional): If True, two quarter turns are written as a half turn (X2). Defaults to False.
+
+    Returns:
+        list[str]: The optimized algorithm
+    """
+    return simplify_algorithm(peephole_optimize(simplify_algorithm(algorithm)), half_turns)
 
 
 def is_solved(internal_cube: RubiksCube):
@@ -0,0 +1,102 @@
+from itertools import permutations, product
+import numpy as np
+from facelets import facelet_locs, facelet_index, solved_facelets
+
+# The 48 symmetries of the cube (24 rotations and their mirror images), each given as a signed
+# permutation matrix acting on the piece coordinates. Applying a symmetry moves every sticker to
+# its rotated/reflected place and then relabels the colors so the centers are back in the solved
+# scheme, which turns any position into an equivalent one (the same distance from solved).
+
+face_normals = [(0, 0, 1), (0, -1, 0), (1, 0, 0), (0, 1, 0), (-1, 0, 0), (0, 0, -1)]
+move_faces = ["U", "F", "R", "B", "L", "D"]
+
+
+def generate_symmetry_matrices() -> list[np.ndarray]:
+    """Generates the 48 signed permutation matrices, starting with the identity
+
+    Returns:
+        list[np.ndarray]: The symmetry matrices
+    """
+    matrices = []
+    for axes in permutations(range(3)):
+        for signs in product((1, -1), repeat=3):
+            matrix = np.zeros((3, 3), dtype=int)
+            for row, (axis, sign) in enumerate(zip(axes, signs)):
+                matrix[row, axis] = sign
+            matrices.append(matrix)
+    return matrices
+
+
+def transform_face(matrix: np.ndarray, face_idx: int) -> int:
+    return face_normals.index(tuple(int(x) for x in np.dot(matrix, face_normals[face_idx])))
+
+
+symmetry_matrices = generate_symmetry_matrices()
+
+# transformed facelets are symmetry_color_luts[s][facelets[symmetry_facelet_perms[s]]]
+symmetry_facelet_perms = np.zeros((48, 54), dtype=np.intp)
+symmetry_color_luts = np.tile(np.arange(256, dtype=np.uint8), (48, 1))
+# symmetry_move_maps[s][move] is the move that does to a transformed cube what move does to the original
+symmetry_move_maps = []
+
+for s, matrix in enumerate(symmetry_matrices):
+    for i, (loc, face_idx) in enumerate(facelet_locs):
+        new_loc = tuple(int(x) for x in np.dot(matrix, loc))
+        symmetry_facelet_perms[s, facelet_index[(new_loc, transform_face(matrix, face_idx))]] = i
+
+    move_map = {}
+    for face_idx in range(6):
+        new_face_idx = transform_face(matrix, face_idx)
+        symmetry_color_luts[s, solved_facelets[face_idx * 9]] = solved_facelets[new_face_idx * 9]
+
+        # a mirror image turns the other way
+        mirrored = round(np.linalg.det(matrix)) == -1
+        face, new_face = move_faces[face_idx], move_faces[new_face_idx]
+        move_map[face] = new_face + ("'" if mirrored else "")
+        move_map[face + "'"] = new_face + ("" if mirrored else "'")
+        move_map[face + "2"] = new_face + "2"
+    symmetry_move_maps.append(move_map)
+
+inverse_symmetries = [next(t for t in range(48) if np.array_equal(np.dot(symmetry_matrices[t], matrix), np.eye(3)))
+                      for matrix in symmetry_matrices]
+
+
+def transform_facelets(facelets: np.ndarray, s: int) -> np.ndarray:
+    """Applies a symmetry to a cube state
+
+    Args:
+        facelets (np.ndarray): The 54 facelet colors, or an N x 54 array of cube states
+        s (int): The index of the symmetry
+
+    Returns:
+        np.ndarray: The facelets of the transformed cube(s)
+    """
+    return symmetry_color_luts[s][facelets[..., symmetry_facelet_perms[s]]]
+
+
+def transform_moves(moves: list[str], s: int) -> list[str]:
+    """Maps a move sequence through a symmetry
+
+    Args:
+        moves (list[str]): The moves to map (quarter or half turns)
+        s (int): The index of the symmetry
+
+    Returns:
+        list[str]: Moves that do to the transformed cube what the given moves do to the original
+    """
+    return [symmetry_move_maps[s][move_type] for move_type in moves]
+
+
+def canonicalize(facelets: np.ndarray) -> tuple[bytes, int]:
+    """Finds the representative of a state among its 48 symmetric equivalents
+
+    Args:
+        facelets (np.ndarray): The 54 facelet colors
+
+    Returns:
+        tuple[bytes, int]: The smallest state key over all symmetries, and a symmetry that produces it
+    """
+    transformed = symmetry_color_luts[np.arange(48)[:, None], facelets[symmetry_facelet_perms]]
+    keys = [row.tobytes() for row in transformed]
+    s = min(range(48), key=keys.__getitem__)
+    return keys[s], s
@@ -0,0 +1,127 @@
+import json
+import os
+import zlib
+import numpy as np
+
+# A table file is the magic bytes, the header length as a little-endian uint32, a JSON header and then the
+# raw table data, which starts on a 64 byte boundary so it can be memory-mapped as an aligned array.
+# Every process that maps the same file shares one physical copy of the table through the page cache.
+magic = b"RCTABLE\0"
+store_format_version = 1
+data_alignment = 64
+
+tables_dir = os.environ.get("RUBIKS_TABLES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables"))
+# checking the checksum reads every page of a table, so existing files are only checked when this is set
+verify_tables = os.environ.get("RUBIKS_VERIFY_TABLES", "") not in ("", "0")
+
+
+def write_table(path: str, array: np.ndarray, name: str, version: int):
+    """Writes a table file, replacing any existing file atomically
+
+    Args:
+        path (str): The file to write
+        array (np.ndarray): The table
+        name (str): The name of the table, checked when it is read back
+        version (int): The version of the code that generated the table, checked when it is read back
+    """
+    array = np.ascontiguousarray(array)
+    header = json.dumps({
+        "format": store_format_version,
+        "name": name,
+        "version": version,
+        "dtype": array.dtype.str,
+        "shape": list(array.shape),
+        "crc32": zlib.crc32(array)
+    }).encode()
+    # pad the header with spaces so the data is aligned
+    header_end = len(magic) + 4 + len(header)
+    header += b" " * (-header_end % data_alignment)
+
+    # written under a name unique to this process, so workers generating the same table don't collide
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(magic)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_table(path: str, name: str, version: int, verify: bool = False) -> np.memmap | None:
+    """Memory-maps a table file
+
+    Args:
+        path (str): The file to read
+        name (str): The name the table must have been written with
+        version (int): The version the table must have been written with
+        verify (bool, optional): Whether to check the data against the checksum in the header, which reads the
+            whole table. Defaults to False (only the header and the file size are checked).
+
+    Returns:
+        np.memmap | None: The read-only table, or None if the file is missing, stale or corrupt (or truncated, if
+            not verified)
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(magic)) != magic:
+                return None
+            header_length = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(header_length))
+    except (OSError, ValueError):
+        return None
+
+    if header.get("format") != store_format_version or header.get("name") != name or header.get("version") != version:
+        return None
+
+    dtype, shape = np.dtype(header["dtype"]), tuple(header["shape"])
+    offset = len(magic) + 4 + header_length
+    if os.path.getsize(path) != offset + dtype.itemsize * int(np.prod(shape)):
+        return None
+    table = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+    if verify and zlib.crc32(table) != header["crc32"]:
+        return None
+    return table
+
+
+class TableStore:
+    """This is a class that keeps generated tables in a directory, generating each one the first time it is asked for"""
+
+    def __init__(self, directory: str = tables_dir, verify: bool = verify_tables):
+        """Constructor for TableStore
+
+        Args:
+            directory (str, optional): The directory the table files are kept in, created when the first table is written.
+                Defaults to tables/ next to this file, or $RUBIKS_TABLES_DIR.
+            verify (bool, optional): Whether to check existing files against their checksums when they are loaded.
+                Defaults to False, or True if $RUBIKS_VERIFY_TABLES is set.
+        """
+        self.directory = directory
+        self.verify = verify
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name + ".tbl")
+
+    def load(self, name: str, version: int, generate) -> np.memmap:
+        """Memory-maps a table, generating and writing it first if the file is missing, stale or corrupt
+
+        Args:
+            name (str): The name of the table
+            version (int): The version of the code that generates the table, a file with another version is regenerated
+            generate: A function that generates the table
+
+        Raises:
+            OSError: If the generated table does not read back correctly
+
+        Returns:
+            np.memmap: The read-only table
+        """
+        path = self.path(name)
+        table = read_table(path, name, version, self.verify)
+        if table is None:
+            os.makedirs(self.directory, exist_ok=True)
+            write_table(path, generate(), name, version)
+            # a new file is checked once, so a bad write is caught before any other process maps it
+            table = read_table(path, name, version, verify=True)
+            if table is None:
+                raise OSError(f"Table {name} could not be written to {path}")
+        return table
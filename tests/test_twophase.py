@@ -0,0 +1,29 @@
+import random
+import pytest
+import twophase
+from algorithms import simplify_algorithm
+from cube import RubiksCube
+
+single_moves = [face + suffix for face in "URFDLB" for suffix in ["", "2", "'"]]
+
+
+def scrambled(scramble: list[str]) -> RubiksCube:
+    cube = RubiksCube()
+    cube.apply_algorithm(scramble)
+    return cube
+
+
+def random_scrambles(count: int, seed: int = 0) -> list[list[str]]:
+    rng = random.Random(seed)
+    return [simplify_algorithm([rng.choice(single_moves) for _ in range(rng.randint(2, 4))], True)
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("scramble", [[move] for move in single_moves] + [["R", "U"], ["R", "U", "F"]] +
+                         random_scrambles(30))
+def test_short_scramble_solution_is_not_longer(scramble):
+    cube = scrambled(scramble)
+    solution = twophase.solve(cube)
+    assert len(solution) <= len(scramble)
+    cube.apply_algorithm(solution)
+    assert cube.check_solved()
@@ -0,0 +1,456 @@
+"""A two-phase solver (Kociemba's algorithm) working directly on the project's cube state.
+
+Phase 1 brings the cube into the subgroup generated by U, D, R2, L2, F2 and B2 (all corners and
+edges oriented, middle layer edges in the middle layer). Phase 2 solves the cube using only those
+moves. Both phases are iterative deepening searches over coordinates of the cube, guided by
+pruning tables that give a lower bound on the number of moves left.
+
+The coordinate move tables and pruning tables are generated the first time a solve needs them and
+saved to disk through a TableStore, later runs (and other processes) memory-map the saved files.
+"""
+import time
+from functools import lru_cache
+from itertools import combinations, permutations
+import numpy as np
+from algorithms import expand_half_turns, simplify_algorithm
+from cube import RubiksCube
+from facelets import facelet_index, solved_facelets, move_perms
+from symmetry import face_normals
+from table_store import TableStore
+
+# The 18 moves in the order used by every table: for each face, a clockwise quarter turn, a half turn and
+# a counter-clockwise quarter turn. Faces are numbered so that face + 3 is the opposite face.
+search_faces = ["U", "R", "F", "D", "L", "B"]
+search_moves = [face + suffix for face in search_faces for suffix in ("", "2", "'")]
+phase2_moves = [m for m, move_type in enumerate(search_moves) if move_type[0] in "UD" or move_type[-1] == "2"]
+
+# Cubie positions, in Kociemba's order (URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB for the corners and
+# UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR for the edges). The last 4 edges make up the middle layer.
+corner_locs = [(1, -1, 1), (-1, -1, 1), (-1, 1, 1), (1, 1, 1), (1, -1, -1), (-1, -1, -1), (-1, 1, -1), (1, 1, -1)]
+edge_locs = [(1, 0, 1), (0, -1, 1), (-1, 0, 1), (0, 1, 1), (1, 0, -1), (0, -1, -1), (-1, 0, -1), (0, 1, -1),
+             (1, -1, 0), (-1, -1, 0), (-1, 1, 0), (1, 1, 0)]
+
+# bump when a change to this module changes the contents of a table, so the saved files are regenerated
+tables_version = 1
+table_store = TableStore()
+# nodes searched for a shorter solution after one of at most max_length moves is found, enough to finish the
+# search for short scrambles while adding little to the time of random ones
+refine_nodes = 10000
+
+
+def cubie_facelets(loc: tuple[int]) -> list[int]:
+    """Lists the facelets of the cubie at a position, starting with the one its orientation is measured on
+
+    Corners start with their U/D facelet and go around in the same direction for every corner. Edges start
+    with their U/D facelet, or their F/B facelet for the middle layer edges.
+
+    Args:
+        loc (tuple[int]): The position of the cubie (x, y, z)
+
+    Returns:
+        list[int]: The facelet indices
+    """
+    x, y, z = loc
+    if x and y and z:
+        normals = [(0, 0, z), (x, 0, 0), (0, y, 0)]
+        if round(np.linalg.det(normals)) != 1:
+            normals = [normals[0], normals[2], normals[1]]
+    elif z:
+        normals = [(0, 0, z), (x, y, 0)]
+    else:
+        normals = [(0, y, 0), (x, 0, 0)]
+    return [facelet_index[(loc, face_normals.index(normal))] for normal in normals]
+
+
+corner_facelets = [cubie_facelets(loc) for loc in corner_locs]
+edge_facelets = [cubie_facelets(loc) for loc in edge_locs]
+corner_ids = {frozenset(int(solved_facelets[f]) for f in fs): i for i, fs in enumerate(corner_facelets)}
+edge_ids = {frozenset(int(solved_facelets[f]) for f in fs): i for i, fs in enumerate(edge_facelets)}
+ud_colors = {ord("w"), ord("y")}
+# the color each edge is oriented by (its U/D color, or its F/B color for the middle layer edges)
+edge_reference_colors = [int(solved_facelets[fs[0]]) for fs in edge_facelets]
+
+
+def cubie_state(facelets: np.ndarray) -> tuple[list[int], list[int], list[int], list[int]]:
+    """Reads the corner and edge permutation and orientation off a facelet array
+
+    Args:
+        facelets (np.ndarray): The 54 facelet colors
+
+    Raises:
+        ValueError: If the facelets are not a solvable cube
+
+    Returns:
+        tuple[list[int], list[int], list[int], list[int]]: The cubie at each corner position, the twist of each corner,
+            the cubie at each edge position and the flip of each edge
+    """
+    cp, co, ep, eo = [], [], [], []
+    try:
+        for fs in corner_facelets:
+            colors = [int(facelets[f]) for f in fs]
+            cp.append(corner_ids[frozenset(colors)])
+            co.append(next(i for i, color in enumerate(colors) if color in ud_colors))
+        for fs in edge_facelets:
+            colors = [int(facelets[f]) for f in fs]
+            ep.append(edge_ids[frozenset(colors)])
+            eo.append(0 if colors[0] == edge_reference_colors[ep[-1]] else 1)
+    except (KeyError, StopIteration):
+        raise ValueError("Invalid cube state")
+
+    if len(set(cp)) != 8 or len(set(ep)) != 12 or sum(co) % 3 or sum(eo) % 2 or \
+            permutation_parity(cp) != permutation_parity(ep):
+        raise ValueError("Invalid cube state")
+    return cp, co, ep, eo
+
+
+def permutation_parity(perm: list[int]) -> int:
+    return sum(1 for i in range(len(perm)) for j in range(i) if perm[j] > perm[i]) % 2
+
+
+# the cubie state of every move, applied as cp[i] = old_cp[move_cp[i]], co[i] = old_co[move_cp[i]] + move_co[i]
+move_cubies = [cubie_state(solved_facelets[move_perms[move_type]]) for move_type in search_moves]
+
+
+def apply_move(state: tuple[list[int], list[int], list[int], list[int]], m: int) -> tuple[list[int], list[int], list[int], list[int]]:
+    """Applies a move to a cubie state
+
+    Args:
+        state (tuple): The cubie state, as returned by cubie_state
+        m (int): The index of the move in search_moves
+
+    Returns:
+        tuple: The cubie state after the move
+    """
+    cp, co, ep, eo = state
+    mcp, mco, mep, meo = move_cubies[m]
+    return ([cp[i] for i in mcp], [(co[mcp[i]] + mco[i]) % 3 for i in range(8)],
+            [ep[i] for i in mep], [(eo[mep[i]] + meo[i]) % 2 for i in range(12)])
+
+
+# coordinates
+
+slice_combinations = list(combinations(range(12), 4))
+solved_slice = slice_combinations.index((8, 9, 10, 11))
+# bitmask of the positions holding a middle layer edge -> slice coordinate
+slice_lookup = np.zeros(1 << 12, dtype=np.uint16)
+for i, positions in enumerate(slice_combinations):
+    slice_lookup[sum(1 << p for p in positions)] = i
+
+
+def rank_permutations(perms: np.ndarray) -> np.ndarray:
+    """Ranks permutations in lexicographic order (the order itertools.permutations lists them in)
+
+    Args:
+        perms (np.ndarray): An N x n array with one permutation of range(n) per row
+
+    Returns:
+        np.ndarray: The rank of each permutation
+    """
+    n = perms.shape[1]
+    ranks = np.zeros(len(perms), dtype=np.int64)
+    for i in range(n):
+        ranks = ranks * (n - i) + (perms[:, i + 1:] < perms[:, i:i + 1]).sum(axis=1)
+    return ranks
+
+
+def twist_coord(co: list[int]) -> int:
+    return int(np.dot(co[:7], 3 ** np.arange(6, -1, -1)))
+
+
+def flip_coord(eo: list[int]) -> int:
+    return int(np.dot(eo[:11], 2 ** np.arange(10, -1, -1)))
+
+
+def slice_coord(ep: list[int]) -> int:
+    return int(slice_lookup[sum(1 << i for i, e in enumerate(ep) if e >= 8)])
+
+
+def corners_coord(cp: list[int]) -> int:
+    return int(rank_permutations(np.array([cp]))[0])
+
+
+def ud_edges_coord(ep: list[int]) -> int:
+    return int(rank_permutations(np.array([ep[:8]]))[0])
+
+
+def slice_perm_coord(ep: list[int]) -> int:
+    return int(rank_permutations(np.array([ep[8:]]) - 8)[0])
+
+
+# move tables, table[coord, m] is the coordinate after move m
+
+def generate_twist_moves() -> np.ndarray:
+    co = (np.arange(2187)[:, None] // 3 ** np.arange(6, -1, -1)) % 3
+    co = np.hstack([co, (-co.sum(axis=1, keepdims=True)) % 3])
+    table = np.zeros((2187, 18), dtype=np.uint16)
+    for m, (mcp, mco, _, _) in enumerate(move_cubies):
+        table[:, m] = ((co[:, mcp] + mco) % 3)[:, :7] @ 3 ** np.arange(6, -1, -1)
+    return table
+
+
+def generate_flip_moves() -> np.ndarray:
+    eo = (np.arange(2048)[:, None] >> np.arange(10, -1, -1)) & 1
+    eo = np.hstack([eo, eo.sum(axis=1, keepdims=True) % 2])
+    table = np.zeros((2048, 18), dtype=np.uint16)
+    for m, (_, _, mep, meo) in enumerate(move_cubies):
+        table[:, m] = ((eo[:, mep] + meo) % 2)[:, :11] @ 2 ** np.arange(10, -1, -1)
+    return table
+
+
+def generate_slice_moves() -> np.ndarray:
+    occupied = np.zeros((495, 12), dtype=np.int64)
+    for i, positions in enumerate(slice_combinations):
+        occupied[i, list(positions)] = 1
+    table = np.zeros((495, 18), dtype=np.uint16)
+    for m, (_, _, mep, _) in enumerate(move_cubies):
+        table[:, m] = slice_lookup[occupied[:, mep] @ (1 << np.arange(12))]
+    return table
+
+
+def generate_permutation_moves(n: int, offset: int, cubie: int) -> np.ndarray:
+    """Generates a phase 2 move table for a permutation coordinate
+
+    Args:
+        n (int): The number of cubies permuted
+        offset (int): The first position of those cubies
+        cubie (int): 0 for corners, 2 for edges (the index into a cubie state)
+
+    Returns:
+        np.ndarray: The table, with one column per phase 2 move
+    """
+    perms = np.array(list(permutations(range(n))), dtype=np.int64)
+    table = np.zeros((len(perms), len(phase2_moves)), dtype=np.uint16)
+    for i, m in enumerate(phase2_moves):
+        move_perm = np.array(move_cubies[m][cubie][offset:offset + n]) - offset
+        table[:, i] = rank_permutations(perms[:, move_perm])
+    return table
+
+
+def generate_pruning_table(moves_a: np.ndarray, moves_b: np.ndarray, start: int) -> np.ndarray:
+    """Finds the distance from the goal of every pair of coordinates with a breadth-first search
+
+    Args:
+        moves_a (np.ndarray): The move table of the first coordinate
+        moves_b (np.ndarray): The move table of the second coordinate (with the same moves)
+        start (int): The goal, as a combined index a * len(moves_b) + b
+
+    Returns:
+        np.ndarray: The number of moves needed for each combined index
+    """
+    size_b = len(moves_b)
+    table = np.full(len(moves_a) * size_b, -1, dtype=np.int8)
+    table[start] = 0
+    frontier = np.array([start], dtype=np.int64)
+    depth = 0
+    while len(frontier):
+        a, b = np.divmod(frontier, size_b)
+        neighbors = (moves_a[a].astype(np.int64) * size_b + moves_b[b]).ravel()
+        neighbors = np.unique(neighbors[table[neighbors] < 0])
+        depth += 1
+        table[neighbors] = depth
+        frontier = neighbors
+    return table
+
+
+def load_table(name: str, generate) -> np.ndarray:
+    """Loads a table from the table store, generating and saving it first if it is missing or stale
+
+    Args:
+        name (str): The name of the table
+        generate: A function that generates the table
+
+    Returns:
+        np.ndarray: The table, memory-mapped from disk
+    """
+    return table_store.load("twophase_" + name, tables_version, generate)
+
+
+class Tables:
+    """This is a class that holds every table the search needs, in the form that is fastest to index from Python"""
+
+    def __init__(self):
+        twist_moves = load_table("twist_moves", generate_twist_moves)
+        flip_moves = load_table("flip_moves", generate_flip_moves)
+        slice_moves = load_table("slice_moves", generate_slice_moves)
+        corners_moves = load_table("corners_moves", lambda: generate_permutation_moves(8, 0, 0))
+        ud_edges_moves = load_table("ud_edges_moves", lambda: generate_permutation_moves(8, 0, 2))
+        slice_perm_moves = load_table("slice_perm_moves", lambda: generate_permutation_moves(4, 8, 2))
+
+        # move tables are small enough to be kept as lists, which index much faster than arrays
+        self.twist_moves = twist_moves.tolist()
+        self.flip_moves = flip_moves.tolist()
+        self.slice_moves = slice_moves.tolist()
+        self.corners_moves = corners_moves.tolist()
+        self.ud_edges_moves = ud_edges_moves.tolist()
+        self.slice_perm_moves = slice_perm_moves.tolist()
+
+        # pruning tables stay memory-mapped, a memoryview indexes them without copying
+        self.slice_twist_prune = memoryview(load_table("slice_twist_prune", lambda: generate_pruning_table(
+            slice_moves, twist_moves, solved_slice * 2187)))
+        self.slice_flip_prune = memoryview(load_table("slice_flip_prune", lambda: generate_pruning_table(
+            slice_moves, flip_moves, solved_slice * 2048)))
+        self.corners_slice_prune = memoryview(load_table("corners_slice_prune", lambda: generate_pruning_table(
+            corners_moves, slice_perm_moves, 0)))
+        self.edges_slice_prune = memoryview(load_table("edges_slice_prune", lambda: generate_pruning_table(
+            ud_edges_moves, slice_perm_moves, 0)))
+
+
+@lru_cache(maxsize=None)
+def get_tables() -> Tables:
+    """Loads (or generates) the tables the first time a solve needs them
+
+    Returns:
+        Tables: The shared tables
+    """
+    return Tables()
+
+
+class TwoPhaseSearch:
+    """This is a class that holds the state of one two-phase search"""
+
+    def __init__(self, state: tuple, max_length: int, timeout: float, last_face: int = -1, cancel=None):
+        """Constructor for TwoPhaseSearch
+
+        Args:
+            state (tuple): The cubie state to solve, as returned by cubie_state
+            max_length (int): Stop as soon as a solution of at most this many moves is found
+            timeout (float): The number of seconds after which the best solution so far is returned
+            last_face (int, optional): The face of the move made before this state, which the first move must not repeat. Defaults to -1.
+            cancel (optional): An event (anything with is_set) that stops the search when set. Defaults to None.
+        """
+        self.tables = get_tables()
+        self.state = state
+        self.max_length = max_length
+        self.deadline = time.monotonic() + timeout
+        self.last_face = last_face
+        self.cancel = cancel
+        self.best = None
+        # solutions must be shorter than this, lowered every time one is found
+        self.limit = 31
+        self.phase1_moves = []
+        self.phase2_moves = []
+        self.nodes = 0
+        # the node count when the first solution of at most max_length moves was found
+        self.found_nodes = None
+
+    def done(self) -> bool:
+        return (self.found_nodes is not None and self.nodes - self.found_nodes > refine_nodes) or \
+            time.monotonic() > self.deadline or \
+            (self.cancel is not None and self.cancel.is_set())
+
+    def run(self) -> list[str] | None:
+        """Runs the search until a short enough solution is found (and refine_nodes more nodes were searched for a
+        shorter one), the time runs out or every length was tried
+
+        Returns:
+            list[str] | None: The shortest solution found, or None
+        """
+        cp, co, ep, eo = self.state
+        twist, flip, slice_ = twist_coord(co), flip_coord(eo), slice_coord(ep)
+        tables = self.tables
+        depth = max(tables.slice_twist_prune[slice_ * 2187 + twist], tables.slice_flip_prune[slice_ * 2048 + flip])
+        while depth < self.limit and not self.done():
+            self.phase1(twist, flip, slice_, depth, self.last_face)
+            depth += 1
+        return self.best
+
+    def phase1(self, twist: int, flip: int, slice_: int, togo: int, last_face: int):
+        self.nodes += 1
+        if togo == 0:
+            # a phase 1 solution ending in a phase 2 move was already tried as a shorter one
+            if not self.phase1_moves or self.phase1_moves[-1] not in phase2_moves:
+                self.start_phase2()
+            return
+        if self.done():
+            return
+
+        tables = self.tables
+        for m in range(18):
+            face = m // 3
+            # turning the same face twice in a row, or opposite faces in both orders, is redundant
+            if face == last_face or face == last_face - 3:
+                continue
+            new_twist = tables.twist_moves[twist][m]
+            new_flip = tables.flip_moves[flip][m]
+            new_slice = tables.slice_moves[slice_][m]
+            if tables.slice_twist_prune[new_slice * 2187 + new_twist] >= togo or \
+                    tables.slice_flip_prune[new_slice * 2048 + new_flip] >= togo:
+                continue
+            self.phase1_moves.append(m)
+            self.phase1(new_twist, new_flip, new_slice, togo - 1, face)
+            self.phase1_moves.pop()
+            if self.done():
+                return
+
+    def start_phase2(self):
+        state = self.state
+        for m in self.phase1_moves:
+            state = apply_move(state, m)
+        cp, _, ep, _ = state
+        corners, ud_edges, slice_perm = corners_coord(cp), ud_edges_coord(ep), slice_perm_coord(ep)
+
+        tables = self.tables
+        depth = max(tables.corners_slice_prune[corners * 24 + slice_perm], tables.edges_slice_prune[ud_edges * 24 + slice_perm])
+        last_face = self.phase1_moves[-1] // 3 if self.phase1_moves else self.last_face
+        # phase 1 ends with a quarter turn, so phase 2 may start with half turns on the same axis (merged below),
+        # otherwise X in phase 1 forces a long detour where X' followed by phase 2 would be short
+        while depth < self.limit - len(self.phase1_moves):
+            if self.phase2(corners, ud_edges, slice_perm, depth, last_face, bool(self.phase1_moves)):
+                solution = simplify_algorithm([search_moves[m] for m in self.phase1_moves + self.phase2_moves], True)
+                self.phase2_moves = []
+                if len(solution) >= self.limit:
+                    return
+                self.best = solution
+                self.limit = len(self.best)
+                if self.found_nodes is None and self.limit <= self.max_length:
+                    self.found_nodes = self.nodes
+                return
+            depth += 1
+
+    def phase2(self, corners: int, ud_edges: int, slice_perm: int, togo: int, last_face: int,
+               same_face: bool = False) -> bool:
+        self.nodes += 1
+        if togo == 0:
+            return corners == 0 and ud_edges == 0 and slice_perm == 0
+
+        tables = self.tables
+        for i, m in enumerate(phase2_moves):
+            face = m // 3
+            if not same_face and (face == last_face or face == last_face - 3):
+                continue
+            new_corners = tables.corners_moves[corners][i]
+            new_ud_edges = tables.ud_edges_moves[ud_edges][i]
+            new_slice_perm = tables.slice_perm_moves[slice_perm][i]
+            if tables.corners_slice_prune[new_corners * 24 + new_slice_perm] >= togo or \
+                    tables.edges_slice_prune[new_ud_edges * 24 + new_slice_perm] >= togo:
+                continue
+            self.phase2_moves.append(m)
+            if self.phase2(new_corners, new_ud_edges, new_slice_perm, togo - 1, face):
+                return True
+            self.phase2_moves.pop()
+        return False
+
+
+def solve(cube: RubiksCube, max_length: int = 22, timeout: float = 10.0, half_turns: bool = True) -> list[str]:
+    """Solves the cube with the two-phase algorithm
+
+    Args:
+        cube (RubiksCube): The cube to solve, it is not changed
+        max_length (int, optional): Return the first solution with at most this many moves (half turns count as one). Defaults to 22.
+        timeout (float, optional): Seconds after which the best solution found so far is returned. Defaults to 10.0.
+        half_turns (bool, optional): If False, half turns are written as two quarter turns. Defaults to True.
+
+    Raises:
+        ValueError: If the cube is not solvable
+        TimeoutError: If no solution was found in time
+
+    Returns:
+        list[str]: The moves that solve the cube
+    """
+    solution = TwoPhaseSearch(cubie_state(cube.state.facelets), max_length, timeout).run()
+    if solution is None:
+        raise TimeoutError("No solution found within the time limit")
+    if not half_turns:
+        solution = expand_half_turns(solution)
+    return solution
+